@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, literal, select
+from App.database import db, unit_of_work
+from App.models import ArchivedRequest, DataVersion, Request
+
+# Defaults for the REQUEST_ARCHIVE_* settings
+BATCH_SIZE = 500
+INTERVAL_SECONDS = 3600
+
+# app.extensions key holding the background archiver's stop event
+WORKER_KEY = 'request_archiver'
+
+
+def _setting(name, default):
+    return current_app.config.get(f'REQUEST_ARCHIVE_{name}', default)
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move up to batch_size closed requests decided before cutoff to requests_archive
+    Requests closed before decided_at was recorded age on their submission time.
+    The rows are picked with FOR UPDATE SKIP LOCKED, copied with one INSERT ... SELECT and deleted, all in one
+    transaction. Request counts are left alone: archived requests still count.
+
+    Returns:
+        The number of requests moved
+    """
+    live = Request.__table__
+    archive = ArchivedRequest.__table__
+    columns = [column.name for column in live.columns]
+    with unit_of_work():
+        request_ids = db.session.execute(
+            select(live.c.requestID)
+            .where(
+                live.c.status.in_(Request.CLOSED_STATUSES),
+                func.coalesce(live.c.decided_at, live.c.timestamp) < cutoff
+            )
+            .order_by(live.c.requestID)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not request_ids:
+            return 0
+        db.session.execute(archive.insert().from_select(
+            columns + ['archived_at'],
+            select(*[live.c[name] for name in columns], literal(datetime.utcnow()))
+            .where(live.c.requestID.in_(request_ids))
+        ))
+        db.session.execute(
+            live.delete().where(live.c.requestID.in_(request_ids)),
+            execution_options={'synchronize_session': False}
+        )
+        DataVersion.touch(db.session, 'requests')
+    return len(request_ids)
+
+def archive_closed(after_days=None, batch_size=None):
+    """
+    Archive every request closed more than after_days ago (REQUEST_ARCHIVE_AFTER_DAYS)
+    One transaction per batch, so live traffic is never blocked for long
+    Returns the number of requests moved
+    """
+    after_days = after_days if after_days is not None else _setting('AFTER_DAYS', None)
+    if after_days is None:
+        raise ValueError("Set REQUEST_ARCHIVE_AFTER_DAYS or pass the age to archive after")
+    batch_size = batch_size or _setting('BATCH_SIZE', BATCH_SIZE)
+    cutoff = datetime.utcnow() - timedelta(days=after_days)
+    moved = 0
+    while True:
+        count = archive_batch(cutoff, batch_size)
+        moved += count
+        if count < batch_size:
+            return moved
+
+def run_archiver(app, stop, interval_seconds=None):
+    """Archive old closed requests every interval until stop is set"""
+    interval_seconds = interval_seconds or app.config.get('REQUEST_ARCHIVE_INTERVAL_SECONDS', INTERVAL_SECONDS)
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                archive_closed()
+            except Exception as e:
+                app.logger.warning(f"Request archiver error: {e}")
+            finally:
+                db.session.remove()
+        stop.wait(interval_seconds)
+
+def start_archiver(app):
+    """
+    Run the archiver on a daemon thread in this process
+    Returns its stop event, or None when REQUEST_ARCHIVE_AFTER_DAYS is not set
+    """
+    if app.config.get('REQUEST_ARCHIVE_AFTER_DAYS') is None:
+        return None
+    stop = threading.Event()
+    threading.Thread(target=run_archiver, args=(app, stop), daemon=True).start()
+    app.extensions[WORKER_KEY] = stop
+    return stop
@@ -0,0 +1,238 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g
+
+# flask.g flag set when a response was built from a stale cache entry
+STALE_KEY = 'served_stale'
+# How often each worker writes its hit/miss counts to the shared file
+STATS_FLUSH_SECONDS = 10.0
+
+
+class SingleFlight:
+    """
+    SingleFlight - Collapses concurrent calls for the same key into one
+    The first caller runs the function; callers arriving while it is in flight
+    wait for and share its result (or its exception) instead of repeating the work
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.value = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class SharedCache:
+    """
+    SharedCache - Small key/value cache in a local SQLite file
+    Every gunicorn worker on the host opens the same file, so a value computed
+    by one worker is served by all of them. Each entry is stored with the data
+    version it was computed at and only returned while that version is current.
+    Reads never write: hit/miss counts are kept per worker and added to the
+    file's counters every STATS_FLUSH_SECONDS. If the file is locked, a read
+    is a miss and a write is skipped, so the cache never fails a request.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Per-process: concurrent misses in one worker compute once
+        self.flight = SingleFlight()
+        self._counts = {}
+        self._counts_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry ("
+                "name TEXT PRIMARY KEY, version TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_stat ("
+                "name TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, name, version):
+        """Cached value for name at version, or None (counted as a miss)"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload FROM cache_entry WHERE name = ? AND version = ?", (name, version)
+                ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        self._count(name, 'hits' if row else 'misses')
+        return json.loads(row[0]) if row else None
+
+    def set(self, name, version, value):
+        """Store value for name, replacing whatever older version was cached"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entry (name, version, payload) VALUES (?, ?, ?)",
+                    (name, version, json.dumps(value))
+                )
+        except sqlite3.OperationalError:
+            pass
+        return value
+
+    def peek(self, name):
+        """(version, value) of whatever is cached for name, or None; not counted"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT version, payload FROM cache_entry WHERE name = ?", (name,)
+                ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _count(self, name, counter):
+        with self._counts_lock:
+            counts = self._counts.setdefault(name, {'hits': 0, 'misses': 0})
+            counts[counter] += 1
+            due = time.monotonic() - self._flushed_at >= STATS_FLUSH_SECONDS
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add this worker's hit/miss counts to the shared counters"""
+        with self._counts_lock:
+            counts, self._counts = self._counts, {}
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO cache_stat (name, hits, misses) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                    [(name, c['hits'], c['misses']) for name, c in counts.items()]
+                )
+        except sqlite3.OperationalError:
+            # Keep them for the next flush
+            with self._counts_lock:
+                for name, c in counts.items():
+                    pending = self._counts.setdefault(name, {'hits': 0, 'misses': 0})
+                    pending['hits'] += c['hits']
+                    pending['misses'] += c['misses']
+
+    def compute(self, name, version, compute):
+        """Compute and store the value for name at version, once per worker however many ask"""
+        return self.flight.do(f"{name}@{version}", lambda: self.set(name, version, compute()))
+
+    def get_or_compute(self, name, version, compute, stale=None):
+        """
+        Cached value for name at version, computing it on a miss
+        stale, if given, is called with the version of an older cached entry;
+        when it returns True that entry is returned straight away and the new
+        value is computed in a background thread (stale-while-revalidate)
+        """
+        value = self.get(name, version)
+        if value is not None:
+            return value
+        if stale is not None:
+            cached = self.peek(name)
+            if cached is not None and stale(cached[0]):
+                self.revalidate(name, version, compute)
+                g.setdefault(STALE_KEY, True)
+                return cached[1]
+        return self.compute(name, version, compute)
+
+    def revalidate(self, name, version, compute):
+        """Recompute name at version in a background thread unless that is already running"""
+        if self.flight.in_flight(f"{name}@{version}"):
+            return None
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    self.compute(name, version, compute)
+                except Exception as e:
+                    app.logger.warning(f"Background refresh of {name} failed: {e}")
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """
+        Hit/miss counters per cached name, plus totals
+        Includes this worker's latest counts; other workers' are up to STATS_FLUSH_SECONDS behind
+        """
+        self.flush_stats()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, hits, misses FROM cache_stat ORDER BY name").fetchall()
+        names = {name: {'hits': hits, 'misses': misses} for name, hits, misses in rows}
+        return {
+            'hits': sum(stat['hits'] for stat in names.values()),
+            'misses': sum(stat['misses'] for stat in names.values()),
+            'names': names
+        }
+
+    def clear(self):
+        with self._counts_lock:
+            self._counts = {}
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entry")
+            conn.execute("DELETE FROM cache_stat")
+
+
+def init_cache(app):
+    path = app.config.get('SHARED_CACHE_PATH')
+    if not path:
+        os.makedirs(app.instance_path, exist_ok=True)
+        path = os.path.join(app.instance_path, 'shared-cache.db')
+    app.extensions['shared_cache'] = SharedCache(path)
+
+def get_cache():
+    return current_app.extensions['shared_cache']
+
+def served_stale():
+    """True if the current response was built from a stale cache entry"""
+    return g.get(STALE_KEY, False)
@@ -1,5 +1,14 @@
 from App.database import db
-from App.models import User,Staff,Student,Request
+from App.models import User,Staff,Student,Request,RequestCount,ArchivedRequest
+
+def _requests_with_status(status=None):
+    # Live and archived requests, oldest first, so lists match RequestCount (which counts both)
+    live = Request.query
+    archived = ArchivedRequest.query
+    if status is not None:
+        live = live.filter_by(status=status)
+        archived = archived.filter_by(status=status)
+    return sorted(live.all() + archived.all(), key=lambda request: request.requestID)
 
 #Comamand to list all staff in the database
 def printAllStaff():
@@ -22,7 +31,7 @@ def printAllStudents():
 def listAllRequests():
 
     print("\nAll Requests:")
-    requests = Request.query.all()
+    requests = _requests_with_status()
     for request in requests:
         print(request)
     print("\n")
@@ -31,8 +40,8 @@ def listAllRequests():
 #Comamand to list all approved requests in the database
 def listAllApprovedRequests():
 
-    print("\nAll Approved Requests:")
-    requests = Request.query.filter_by(status='approved').all()
+    print(f"\nAll Approved Requests ({RequestCount.counts()['approved']}):")
+    requests = _requests_with_status('approved')
     for request in requests:
         print(request)
     print("\n")
@@ -40,20 +49,30 @@ def listAllApprovedRequests():
 #Comamand to list all denied requests in the database
 def listAllDeniedRequests():
 
-    print("\nAll Denied Requests:")
-    requests = Request.query.filter_by(status='denied').all()
+    print(f"\nAll Denied Requests ({RequestCount.counts()['denied']}):")
+    requests = _requests_with_status('denied')
     for request in requests:
         print(request)
     print("\n")
 
 #Comamand to list all pending requests in the database
 def listAllPendingRequests():
-    print("\nAll Pending Requests:")
-    requests = Request.query.filter_by(status='pending').all()
+    print(f"\nAll Pending Requests ({RequestCount.counts()['pending']}):")
+    requests = _requests_with_status('pending')
     for request in requests:
         print(request)
     print("\n")
 
+#Comamand to show how many requests are in each status, from the maintained counters
+def printRequestCounts(student_id=None):
+    counts = RequestCount.counts(student_id)
+    scope = f"student {student_id}" if student_id is not None else "all students"
+    print(f"\nRequests for {scope}:")
+    for status, count in counts.items():
+        print(f"{status:<10} {count}")
+    print(f"{'total':<10} {sum(counts.values())}")
+    print("\n")
+
 #Comamand to list all logged hours in the database
 def listAllloggedHours():
     print("\nAll Logged Hours:")
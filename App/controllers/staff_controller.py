@@ -24,12 +24,47 @@ def fetch_all_requests(): #fetches all pending requests for staff to review
     
     return requests_data
 
+# Pending queue filters measured against the current time
+AGE_FILTERS = ('min_age_hours', 'max_age_hours')
+
+def fetch_pending_page(args): #one page of the pending queue from query string args
+    """
+    Read cursor, limit and filters (student_id, min_hours, max_hours,
+    min_age_hours, max_age_hours) from request args and fetch that page
+    Raises ValueError for malformed values
+    """
+    def number(name, cast=float):
+        value = args.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return cast(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name}: {value}")
+
+    limit = number('limit', int) or 50
+    limit = min(max(limit, 1), 200)
+    page = Request.pending_page(
+        cursor=args.get('cursor'),
+        limit=limit,
+        student_id=number('student_id', int),
+        min_hours=number('min_hours'),
+        max_hours=number('max_hours'),
+        min_age_hours=number('min_age_hours'),
+        max_age_hours=number('max_age_hours')
+    )
+    return {
+        'count': len(page['requests']),
+        'requests': [req.get_json() for req in page['requests']],
+        'next_cursor': page['next_cursor']
+    }
+
 def process_request_approval(staff_id, request_id): #staff approves a student's hours request
     staff = Staff.query.get(staff_id)
     if not staff:
         raise ValueError(f"Staff with id {staff_id} not found.")
     
-    request = Request.query.get(request_id)
+    request = Request.find(request_id)
     if not request:
         raise ValueError(f"Request with id {request_id} not found.")
     
@@ -49,7 +84,7 @@ def process_request_denial(staff_id, request_id): #staff denies a student's hour
     if not staff:
         raise ValueError(f"Staff with id {staff_id} not found.")
     
-    request = Request.query.get(request_id)
+    request = Request.find(request_id)
     if not request:
         raise ValueError(f"Request with id {request_id} not found.")
     
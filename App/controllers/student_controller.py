@@ -1,8 +1,8 @@
 from App.database import db
 from App.models import User,Staff,Student,Request
 
-def register_student(name,email,password):
-    new_student=Student.create_student(name,email,password)
+def register_student(name,email,password,cohort=None,department=None):
+    new_student=Student.create_student(name,email,password,cohort,department)
     return new_student
 
 def get_approved_hours(student_id): #calculates and returns the total approved hours for a student
@@ -26,7 +26,7 @@ def fetch_requests(student_id): #fetch requests for a student
     if not student:
         raise ValueError(f"Student with id {student_id} not found.")
 
-    return student.requests
+    return Request.for_student(student_id)
 
 def fetch_accolades(student_id): #fetch accolades for a student
     student = Student.query.get(student_id)
@@ -51,19 +51,15 @@ def initialize_observers_for_record(student_record):
     return student_record
 
 def generate_leaderboard():
-    students = Student.query.all()
-    leaderboard = []
-    for student in students:
-        total_hours=sum(lh.hours for lh in student.loggedhours if lh.status == 'approved')
-
-        leaderboard.append({
-            'name': student.username,
-            'hours': total_hours
-        })
-
-    leaderboard.sort(key=lambda item: item['hours'], reverse=True)
-
-    return leaderboard
+    from App.models import Leaderboard
+    return [
+        {
+            'name': entry['username'],
+            'hours': entry['total_hours'],
+            'rank': entry['rank']
+        }
+        for entry in Leaderboard.rankings('approved')
+    ]
 
 def get_all_students_json():
     students = Student.query.all()
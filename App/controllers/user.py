@@ -1,4 +1,4 @@
-from App.models import User,Request,LoggedHours
+from App.models import User,Request,ArchivedRequest,LoggedHours
 from App.database import db
 
 def create_user(username, password, email):
@@ -34,22 +34,20 @@ def update_user(id, username):
     return None
 
 def view_leaderboard():
-    from App.models.student import Student
-    students = db.session.scalars(db.select(Student)).all()
-    leaderboard = []
-    for student in students:
-        total_hours = sum(lh.hours for lh in student.loggedhours if lh.status == 'approved')
-        leaderboard.append({
-            'student_id': student.student_id,
-            'username': student.username,
-            'total_approved_hours': total_hours
-        })
-    leaderboard.sort(key=lambda x: x['total_approved_hours'], reverse=True)
-    return leaderboard
+    from App.models import Leaderboard
+    return [
+        {
+            'student_id': entry['student_id'],
+            'username': entry['username'],
+            'total_approved_hours': entry['total_hours'],
+            'rank': entry['rank']
+        }
+        for entry in Leaderboard.rankings('approved')
+    ]
 
 def get_all_requests_json():
     
-    requests = Request.query.all()
+    requests = Request.query.all() + ArchivedRequest.query.all()
     if not requests:
         return []
     requests = [req.get_json() for req in requests]
@@ -1,9 +1,13 @@
+from contextlib import contextmanager
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
 
 db = SQLAlchemy()
 
+# session.info key: how many unit_of_work scopes are open on the session
+UNIT_OF_WORK_KEY = 'unit_of_work_depth'
+
 def get_migrate(app):
     return Migrate(app, db)
 
@@ -11,4 +15,26 @@ def create_db():
     db.create_all()
     
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    db.init_app(app)
+
+@contextmanager
+def unit_of_work():
+    """
+    Transaction scope for a write pipeline
+    Only the outermost scope commits (or rolls back if an exception escapes);
+    scopes opened inside it just stage their changes, so a model method commits
+    when called on its own and joins the caller's transaction when composed.
+    """
+    session = db.session
+    depth = session.info.get(UNIT_OF_WORK_KEY, 0)
+    session.info[UNIT_OF_WORK_KEY] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+    except Exception:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info[UNIT_OF_WORK_KEY] = depth
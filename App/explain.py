@@ -0,0 +1,76 @@
+from datetime import datetime
+from sqlalchemy import func, inspect, select
+from App.database import db
+from App.models import ActivityEntry, LoggedHours, Request, User
+
+
+def hot_queries():
+    """
+    (name, index it should use, statement) for the queries the app runs most
+    Parameter values are placeholders; only the plan matters
+    """
+    return [
+        ('pending queue', 'ix_requests_status_timestamp',
+         select(Request.requestID)
+         .where(Request.status == 'pending')
+         .order_by(Request.timestamp, Request.requestID)
+         .limit(50)),
+        ("student's requests by status", 'ix_requests_student_status',
+         select(Request.requestID)
+         .where(Request.studentID == 1, Request.status == 'pending')),
+        ("student's approved logged hours", 'ix_logged_hours_student_status',
+         select(LoggedHours.hours)
+         .where(LoggedHours.student_id == 1, LoggedHours.status == 'approved')),
+        ('activity history', 'ix_activity_entry_record_timestamp',
+         select(ActivityEntry.id)
+         .where(ActivityEntry.student_record_id == 1, ActivityEntry.timestamp >= datetime(2000, 1, 1))
+         .order_by(ActivityEntry.timestamp.desc())),
+        ('user by email', 'ix_users_email',
+         select(User.user_id).where(User.email == 'someone@example.com')),
+        ('users by email, any case', 'ix_users_email_lower',
+         select(User.user_id).where(func.lower(User.email).in_(['someone@example.com', 'other@example.com']))),
+    ]
+
+def explain(statement):
+    """The database's query plan for a statement, as lines of text"""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    # Expand IN lists into their placeholders so the SQL can be sent as it is
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    if dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params).all()
+    return [row[0] for row in rows]
+
+def missing_tables(queries):
+    """Names of the tables the queries read that the database does not have"""
+    inspector = inspect(db.session.connection())
+    names = {table.name for _, _, statement in queries for table in statement.get_final_froms()}
+    return sorted(name for name in names if not inspector.has_table(name))
+
+def report():
+    """
+    EXPLAIN every hot query
+    Returns a list of dicts with the query name, the index expected, whether
+    the plan uses it and the plan itself
+    Raises ValueError if the schema has not been created yet
+    """
+    queries = hot_queries()
+    missing = missing_tables(queries)
+    if missing:
+        raise ValueError(f"Tables missing: {', '.join(missing)}; run flask db upgrade or flask init first")
+    results = []
+    for name, index, statement in queries:
+        plan = explain(statement)
+        results.append({
+            'query': name,
+            'index': index,
+            'uses_index': any(index in line for line in plan),
+            'plan': plan
+        })
+    return results
@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+import math
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from App.database import db, unit_of_work
+from App.models import Request, RequestCount, Student, User
+from App.models.dataversion import DataVersion
+
+# Defaults for the IMPORT_* settings
+CHUNK_SIZE = 500
+MAX_ERRORS = 1000
+
+FORMATS = ('csv', 'jsonl')
+
+
+def _setting(name, default):
+    return current_app.config.get(f'IMPORT_{name}', default)
+
+def detect_format(filename, content_type=None):
+    """'csv' or 'jsonl' from a file name or content type, None if neither"""
+    name = (filename or '').lower()
+    if name.endswith('.csv') or content_type == 'text/csv':
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')) or content_type in ('application/jsonl', 'application/x-ndjson'):
+        return 'jsonl'
+    return None
+
+def iter_rows(stream, fmt):
+    """
+    Yield (line number, row dict) from a binary or text stream, one row at a time
+    Rows that cannot be parsed are yielded as (line number, ValueError)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    if not isinstance(stream, io.TextIOBase):
+        # utf-8-sig drops the byte order mark spreadsheet exports start with
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, ValueError("Too many columns")
+            else:
+                yield reader.line_num, row
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, ValueError("Invalid JSON")
+            continue
+        if isinstance(row, dict):
+            yield line_no, row
+        else:
+            yield line_no, ValueError("Expected a JSON object")
+
+def parse_row(row):
+    """
+    Validate one row's fields
+    A row names its student by student_id or email and has hours > 0 and an
+    optional description
+
+    Returns:
+        dict with student_id or email, hours and description
+
+    Raises:
+        ValueError: describing the first problem found
+    """
+    parsed = {'student_id': None, 'email': None}
+    student_id = row.get('student_id')
+    email = row.get('email')
+    if student_id not in (None, ''):
+        try:
+            parsed['student_id'] = int(student_id)
+        except (TypeError, ValueError):
+            raise ValueError("student_id must be an integer")
+    elif isinstance(email, str) and email.strip():
+        parsed['email'] = email.strip()
+    else:
+        raise ValueError("Missing student_id or email")
+
+    try:
+        hours = float(row.get('hours'))
+    except (TypeError, ValueError):
+        raise ValueError("hours must be a number")
+    if not math.isfinite(hours) or hours <= 0:
+        raise ValueError("Hours must be greater than 0")
+    parsed['hours'] = hours
+
+    description = row.get('description') or None
+    if description is not None:
+        description = str(description)
+        if len(description) > 500:
+            raise ValueError("description is longer than 500 characters")
+    parsed['description'] = description
+    return parsed
+
+def _resolve_students(rows):
+    """
+    Fill in student_id for every parsed row in one lookup by id and one by email
+    Rows whose student does not exist are left with student_id None
+    """
+    ids = {row['student_id'] for row in rows if row['student_id'] is not None}
+    # Emails match case-insensitively, however they were stored, on ix_users_email_lower
+    emails = {row['email'].lower() for row in rows if row['email'] is not None}
+    students = Student.__table__
+    users = User.__table__
+
+    known_ids = set()
+    if ids:
+        known_ids = set(db.session.execute(
+            select(students.c.student_id).where(students.c.student_id.in_(ids))
+        ).scalars())
+    by_email = {}
+    if emails:
+        for email, student_id in db.session.execute(
+            select(users.c.email, students.c.student_id)
+            .join(students, students.c.student_id == users.c.user_id)
+            .where(func.lower(users.c.email).in_(emails))
+            .order_by(students.c.student_id)
+        ):
+            by_email.setdefault(email.lower(), student_id)
+
+    for row in rows:
+        if row['email'] is not None:
+            row['student_id'] = by_email.get(row['email'].lower())
+        elif row['student_id'] not in known_ids:
+            row['student_id'] = None
+
+def _insert_chunk(chunk, counts):
+    """
+    Resolve a chunk's students and insert its valid rows in one transaction
+    Returns (line number, error) for the rows whose student does not exist
+    """
+    _resolve_students([row for _, row in chunk])
+    now = datetime.utcnow()
+    values = []
+    failures = []
+    for line_no, row in chunk:
+        if row['student_id'] is None:
+            failures.append((line_no, "Student not found"))
+            continue
+        values.append({
+            'studentID': row['student_id'],
+            'hours': row['hours'],
+            'description': row['description'],
+            'status': 'pending',
+            'timestamp': now,
+            # Core inserts bypass the mapper, which would set the first version
+            'version': 1
+        })
+    if values:
+        with unit_of_work():
+            db.session.execute(Request.__table__.insert(), values)
+            # ...and the listeners that keep the status counts
+            pending = {}
+            for value in values:
+                key = (value['studentID'], 'pending')
+                pending[key] = pending.get(key, 0) + 1
+            RequestCount.adjust(db.session.connection(), pending)
+            DataVersion.touch(db.session, 'requests')
+        counts['imported'] += len(values)
+    return failures
+
+def import_requests(stream, fmt, chunk_size=None, max_errors=None, on_error=None):
+    """
+    Create pending requests from a CSV or JSON Lines stream
+    Rows are read lazily and handled chunk_size at a time: one student lookup
+    and one bulk insert per chunk, each committed on its own, so a large
+    file never sits in memory and a bad row only rejects itself.
+    CSV files need a header row with student_id (or email), hours and
+    optionally description; JSONL lines are objects with the same keys.
+    Failed rows are reported in line order as each chunk is done, through
+    on_error(line, message) if given.
+
+    Returns:
+        dict with the rows imported and failed, and up to IMPORT_MAX_ERRORS
+        {line, error} entries
+    """
+    chunk_size = chunk_size or _setting('CHUNK_SIZE', CHUNK_SIZE)
+    max_errors = max_errors if max_errors is not None else _setting('MAX_ERRORS', MAX_ERRORS)
+    counts = {'imported': 0, 'failed': 0}
+    errors = []
+    chunk = []
+    # Rows that failed to parse since the last chunk was inserted
+    chunk_failures = []
+    stopped = None
+
+    def fail(line_no, message):
+        counts['failed'] += 1
+        if len(errors) < max_errors:
+            errors.append({'line': line_no, 'error': message})
+        if on_error is not None:
+            on_error(line_no, message)
+
+    def flush():
+        # Parse errors and missing students interleave; report them by line
+        failures = chunk_failures + (_insert_chunk(chunk, counts) if chunk else [])
+        for line_no, message in sorted(failures, key=lambda failure: failure[0]):
+            fail(line_no, message)
+
+    try:
+        for line_no, row in iter_rows(stream, fmt):
+            if isinstance(row, ValueError):
+                chunk_failures.append((line_no, str(row)))
+                continue
+            try:
+                chunk.append((line_no, parse_row(row)))
+            except ValueError as e:
+                chunk_failures.append((line_no, str(e)))
+                continue
+            if len(chunk) >= chunk_size:
+                flush()
+                chunk, chunk_failures = [], []
+    except UnicodeDecodeError:
+        stopped = "File is not UTF-8 text; import stopped"
+    except csv.Error as e:
+        stopped = f"Unreadable CSV ({e}); import stopped"
+    flush()
+    if stopped:
+        fail(None, stopped)
+    return dict(counts, errors=errors)
@@ -6,6 +6,8 @@ from werkzeug.utils import secure_filename
 from werkzeug.datastructures import  FileStorage
 
 from App.database import init_db
+from App.cache import init_cache
+from App.models.observerregistry import init_observers
 from App.config import load_config
 
 
@@ -31,6 +33,8 @@ def create_app(overrides={}):
     configure_uploads(app, photos)
     add_views(app)
     init_db(app)
+    init_cache(app)
+    init_observers(app)
     jwt = setup_jwt(app)
     setup_admin(app)
     @jwt.invalid_token_loader
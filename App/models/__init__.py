@@ -1,11 +1,22 @@
+from .dataversion import DataVersion
 from .user import User
 from .student import Student
 from .staff import Staff
-from .request import Request
+from .request import Request, RequestConflict
+from .archivedrequest import ArchivedRequest
+from .requestcount import RequestCount
 from .loggedhours import LoggedHours
 from .studentrecord import StudentRecord
 from .activityentry import ActivityEntry
+from .outboxevent import OutboxEvent
+from .idempotencykey import IdempotencyKey
+from .observerregistry import ObserverRegistry, HOURS_ADDED, MILESTONE_REACHED
 from .observer import Observer
+from .milestone import MilestoneTable
 from .milestoneobserver import MilestoneObserver
 from .activityhistoryobserver import ActivityHistoryObserver
-from .leaderboard import Leaderboard
+from .rankindex import RankIndex
+from .leaderboardentry import LeaderboardEntry
+from .activitybucket import ActivityBucket
+from .rankingengine import RankingEngine
+from .leaderboard import Leaderboard, LeaderboardSnapshot
@@ -0,0 +1,105 @@
+from App.database import db
+from datetime import datetime
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from .activityentry import ActivityEntry
+from .dataversion import DataVersion
+
+class ActivityBucket(db.Model):
+    """
+    ActivityBucket - Hours logged for one student record on one day
+    Maintained as ActivityEntry rows are written, so a windowed leaderboard
+    sums one row per student per day instead of the full activity history
+    """
+    __tablename__ = "activity_bucket"
+
+    student_record_id = db.Column(db.Integer, db.ForeignKey('student_record.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    hours = db.Column(db.Float, default=0.0, nullable=False)
+    entry_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # Windowed rankings filter by day first, then group by record
+        db.Index('ix_activity_bucket_day', 'day', 'student_record_id'),
+    )
+
+    def __init__(self, student_record_id, day, hours=0.0, entry_count=0):
+        self.student_record_id = student_record_id
+        self.day = day
+        self.hours = hours
+        self.entry_count = entry_count
+
+    def get_json(self):
+        return {
+            'student_record_id': self.student_record_id,
+            'day': self.day.isoformat(),
+            'hours': self.hours,
+            'entry_count': self.entry_count
+        }
+
+    def __repr__(self):
+        return f"[ActivityBucket Record={self.student_record_id} Day={self.day} Hours={self.hours}]"
+
+    @staticmethod
+    def add(connection, student_record_id, day, hours, entry_count=1):
+        """Add hours to a record's bucket for a day, creating it if needed"""
+        table = ActivityBucket.__table__
+        values = {'student_record_id': student_record_id, 'day': day, 'hours': hours, 'entry_count': entry_count}
+        dialect = connection.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            stmt = insert(table).values(**values)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.student_record_id, table.c.day],
+                set_={
+                    'hours': table.c.hours + stmt.excluded.hours,
+                    'entry_count': table.c.entry_count + stmt.excluded.entry_count
+                }
+            ))
+            return
+        result = connection.execute(
+            table.update()
+            .where(table.c.student_record_id == student_record_id, table.c.day == day)
+            .values(hours=table.c.hours + hours, entry_count=table.c.entry_count + entry_count)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**values))
+
+    @staticmethod
+    def rebuild():
+        """
+        Repopulate buckets from the full ActivityEntry history
+        Used to backfill databases created before the table existed
+        """
+        table = ActivityBucket.__table__
+        day = func.date(ActivityEntry.timestamp)
+        totals = (
+            select(
+                ActivityEntry.student_record_id,
+                day,
+                func.sum(ActivityEntry.hours),
+                func.count(ActivityEntry.id)
+            )
+            .where(ActivityEntry.hours != 0)
+            .group_by(ActivityEntry.student_record_id, day)
+        )
+        db.session.execute(table.delete())
+        DataVersion.touch(db.session, 'leaderboard')
+        result = db.session.execute(
+            table.insert().from_select(['student_record_id', 'day', 'hours', 'entry_count'], totals)
+        )
+        db.session.commit()
+        return result.rowcount
+
+
+# Milestone entries carry 0 hours and never move a windowed total
+@event.listens_for(ActivityEntry, 'after_insert')
+def _entry_inserted(mapper, connection, target):
+    if target.hours:
+        day = (target.timestamp or datetime.utcnow()).date()
+        ActivityBucket.add(connection, target.student_record_id, day, target.hours)
+
+@event.listens_for(ActivityEntry, 'after_delete')
+def _entry_deleted(mapper, connection, target):
+    if target.hours:
+        ActivityBucket.add(connection, target.student_record_id, target.timestamp.date(), -target.hours, -1)
@@ -15,6 +15,11 @@ class ActivityEntry(db.Model):
     logged_by = db.Column(db.String(100), nullable=False)  # Staff name or "System"
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # Activity history: one record's entries in time order
+        db.Index('ix_activity_entry_record_timestamp', 'student_record_id', 'timestamp'),
+    )
+
     def __init__(self, student_record_id, hours, description, logged_by, date=None):
         self.student_record_id = student_record_id
         self.hours = hours
@@ -1,11 +1,14 @@
 from App.database import db
 from .observer import Observer 
+from .observerregistry import HOURS_ADDED, MILESTONE_REACHED
 from .activityentry import ActivityEntry
 from datetime import datetime
 
 class ActivityHistoryObserver(Observer):
     """Observer that maintains activity history log"""
 
+    events = (HOURS_ADDED, MILESTONE_REACHED)
+
     def update(self, record):
         """
         Called when StudentRecord is updated
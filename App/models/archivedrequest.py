@@ -0,0 +1,35 @@
+from App.database import db
+from datetime import datetime
+from .request import Request
+
+class ArchivedRequest(db.Model):
+    """
+    ArchivedRequest - A closed request moved out of the live requests table
+    Same columns as Request plus when it was archived. The JSON is built by
+    Request.get_json, so clients can't tell archived requests from live ones.
+    """
+    __tablename__ = "requests_archive"
+
+    requestID = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    studentID = db.Column(db.Integer, db.ForeignKey('student.student_id', ondelete='CASCADE'), nullable=False, index=True)
+    staffID = db.Column(db.Integer, db.ForeignKey('staff.staff_id'), nullable=True)
+    status = db.Column(db.String(20), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    hours = db.Column(db.Float, nullable=False)
+    description = db.Column(db.String(500), nullable=True)
+    decided_at = db.Column(db.DateTime, nullable=True)
+    claimed_by = db.Column(db.Integer, db.ForeignKey('staff.staff_id'), nullable=True)
+    claim_expires_at = db.Column(db.DateTime, nullable=True)
+    version = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    student_id = Request.student_id
+    id = Request.id
+    get_json = Request.get_json
+    # Archived requests are closed, so these only ever raise the usual ValueError
+    accept = Request.accept
+    deny = Request.deny
+    cancel = Request.cancel
+
+    def __repr__(self):
+        return f"<RequestID={self.requestID} StudentID={self.studentID} Hours={self.hours} Status={self.status} (archived)>"
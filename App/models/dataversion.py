@@ -0,0 +1,145 @@
+import uuid
+from App.database import db
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+# session.info key: {name: (epoch, version before, version after)} for the open transaction
+BUMPS_KEY = 'data_version_bumps'
+# session.info key: names to bump when the open transaction commits
+TOUCHED_KEY = 'data_version_touched'
+
+class DataVersion(db.Model):
+    """
+    DataVersion - Named change counters stored alongside the data they describe
+    Bumped in the same transaction as the writes, so every worker reading the
+    counter sees exactly the versions that have been committed. The bump runs
+    just before the commit, so the counter rows are only locked while it
+    finishes rather than for the whole transaction. The epoch is
+    regenerated whenever the table is created, so versions from a dropped
+    database are never mistaken for current ones.
+    """
+    __tablename__ = "data_version"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    epoch = db.Column(db.String(32), nullable=False)
+
+    # Tables whose ORM writes move each named version
+    TRACKED = {
+        'student': ('leaderboard', 'students'),
+        'staff': ('staff',),
+        'student_record': ('leaderboard',),
+        'logged_hours': ('leaderboard',),
+        'activity_entry': ('leaderboard',),
+        'requests': ('requests',),
+        'requests_archive': ('requests',),
+    }
+
+    def __init__(self, name, version=0, epoch=None):
+        self.name = name
+        self.version = version
+        self.epoch = epoch or uuid.uuid4().hex
+
+    def get_json(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'epoch': self.epoch
+        }
+
+    def __repr__(self):
+        return f"[DataVersion {self.name}={self.version} Epoch={self.epoch}]"
+
+    @staticmethod
+    def names():
+        return sorted({name for names in DataVersion.TRACKED.values() for name in names})
+
+    @staticmethod
+    def current(name):
+        """(epoch, version) for a name; a counter that was never bumped reads as ('', 0)"""
+        table = DataVersion.__table__
+        row = db.session.execute(
+            select(table.c.epoch, table.c.version).where(table.c.name == name)
+        ).first()
+        if row is None:
+            return '', 0
+        return row.epoch, row.version
+
+    @staticmethod
+    def token(name):
+        """Opaque string that changes whenever the named data changes"""
+        epoch, version = DataVersion.current(name)
+        return f"{epoch}.{version}"
+
+    @staticmethod
+    def same_epoch(token_a, token_b):
+        """True if two tokens count versions of the same database"""
+        return token_a.split('.')[0] == token_b.split('.')[0]
+
+    @staticmethod
+    def bump(connection, name):
+        """
+        Increment a counter on the given connection
+        Returns (epoch, version before, version after)
+        """
+        table = DataVersion.__table__
+        result = connection.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            epoch = uuid.uuid4().hex
+            connection.execute(table.insert().values(name=name, version=1, epoch=epoch))
+            return epoch, 0, 1
+        epoch, version = connection.execute(
+            select(table.c.epoch, table.c.version).where(table.c.name == name)
+        ).one()
+        return epoch, version - 1, version
+
+    @staticmethod
+    def touch(session, *names):
+        """Bump counters when the session's transaction commits, for writes made outside the ORM"""
+        # Begin first: a new transaction drops whatever an earlier one touched
+        session.connection()
+        session.info.setdefault(TOUCHED_KEY, set()).update(names)
+
+
+def _record_bumps(session, connection, names):
+    bumps = session.info.setdefault(BUMPS_KEY, {})
+    for name in names:
+        epoch, before, after = DataVersion.bump(connection, name)
+        if name in bumps and bumps[name][0] == epoch:
+            before = bumps[name][1]
+        bumps[name] = (epoch, before, after)
+
+
+# A fresh table starts every tracked counter under a new epoch
+@event.listens_for(DataVersion.__table__, 'after_create')
+def _seed_versions(table, connection, **kw):
+    epoch = uuid.uuid4().hex
+    connection.execute(table.insert(), [
+        {'name': name, 'version': 0, 'epoch': epoch} for name in DataVersion.names()
+    ])
+
+@event.listens_for(Session, 'after_begin')
+def _reset_bumps(session, transaction, connection):
+    session.info.pop(BUMPS_KEY, None)
+    session.info.pop(TOUCHED_KEY, None)
+
+@event.listens_for(Session, 'after_flush')
+def _touch_flushed(session, flush_context):
+    names = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        names.update(DataVersion.TRACKED.get(table, ()))
+    if names:
+        session.info.setdefault(TOUCHED_KEY, set()).update(names)
+
+# Each touched counter is bumped once, as late as possible: on Postgres the
+# counter row stays locked from the bump until the commit, and every writer needs it
+@event.listens_for(Session, 'before_commit')
+def _bump_touched(session):
+    # Commit would flush after this hook; flush now so its writes are counted
+    session.flush()
+    names = session.info.pop(TOUCHED_KEY, None)
+    if names:
+        _record_bumps(session, session.connection(), sorted(names))
@@ -0,0 +1,96 @@
+from App.database import db
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+
+class IdempotencyKey(db.Model):
+    """
+    IdempotencyKey - The stored response to a write sent with an Idempotency-Key header
+    A row is reserved before the view runs and filled in with its response
+    afterwards, so a retry with the same key is answered from here instead
+    of repeating the write. Rows expire after a TTL.
+    """
+    __tablename__ = "idempotency_key"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user = db.Column(db.String(64), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # Hash of the method, path and body the key was first used with
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # None while the first attempt is still running
+    status_code = db.Column(db.Integer, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user', 'key', name='uq_idempotency_key_user_key'),
+        db.Index('ix_idempotency_key_expires_at', 'expires_at'),
+    )
+
+    def __init__(self, user, key, fingerprint, ttl_seconds):
+        now = datetime.utcnow()
+        self.user = user
+        self.key = key
+        self.fingerprint = fingerprint
+        self.created_at = now
+        self.expires_at = now + timedelta(seconds=ttl_seconds)
+
+    def __repr__(self):
+        return f"[IdempotencyKey User={self.user} Key={self.key} Status={self.status_code}]"
+
+    @property
+    def completed(self):
+        return self.status_code is not None
+
+    @staticmethod
+    def reserve(user, key, fingerprint, ttl_seconds, lock_seconds):
+        """
+        Claim a key for a new attempt, or find the attempt that already used it
+        Expired keys, and reservations older than lock_seconds whose attempt
+        never finished, are given up and reserved afresh.
+
+        Returns:
+            (row, True) if the key was reserved for the caller, (row, False)
+            if an earlier attempt holds it, or (None, False) if another
+            attempt reserved it at the same moment
+        """
+        table = IdempotencyKey.__table__
+        now = datetime.utcnow()
+        db.session.execute(table.delete().where(table.c.expires_at <= now))
+        db.session.execute(table.delete().where(
+            table.c.user == user,
+            table.c.key == key,
+            table.c.status_code.is_(None),
+            table.c.created_at <= now - timedelta(seconds=lock_seconds)
+        ))
+        existing = IdempotencyKey.query.filter_by(user=user, key=key).first()
+        if existing is not None:
+            db.session.commit()
+            return existing, False
+
+        row = IdempotencyKey(user, key, fingerprint, ttl_seconds)
+        db.session.add(row)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return None, False
+        return row, True
+
+    @staticmethod
+    def complete(row_id, status_code, content_type, body):
+        """Store the response of the attempt holding a key"""
+        table = IdempotencyKey.__table__
+        db.session.execute(
+            table.update().where(table.c.id == row_id)
+            .values(status_code=status_code, content_type=content_type, body=body)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def release(row_id):
+        """Drop a reservation whose attempt failed, so a retry runs again"""
+        table = IdempotencyKey.__table__
+        db.session.execute(table.delete().where(table.c.id == row_id))
+        db.session.commit()
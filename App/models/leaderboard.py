@@ -1,87 +1,413 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app, g
 from App.database import db
+from App.cache import get_cache
+from App.models.dataversion import DataVersion
 from App.models.studentrecord import StudentRecord
 from App.models.student import Student
+from App.models.leaderboardentry import LeaderboardEntry, SNAPSHOT_KEY, INDEX_KEY, SEGMENT_INDEX_KEY
+from App.models.rankindex import RankIndex
+from App.models.rankingengine import RankingEngine
+
+# Catch-ups re-read rows updated this long before the last sync, so a write
+# stamped before then but committed after it is still picked up
+CATCH_UP_MARGIN = timedelta(seconds=60)
+
+# Default for LEADERBOARD_SEGMENT_INDEX_LIMIT: segment indexes kept per worker,
+# least recently used dropped first
+SEGMENT_INDEX_LIMIT = 64
+
+class LeaderboardSnapshot:
+    """
+    LeaderboardSnapshot - The rankings from a single pass over the leaderboard
+    Answers top-k, total count and per-student rank without going back to the DB
+    """
+
+    def __init__(self, rankings):
+        self.rankings = rankings
+        self._by_student = {entry['student_id']: entry for entry in rankings}
+
+    @property
+    def total(self):
+        return len(self.rankings)
+
+    def top(self, limit=10):
+        """First `limit` entries in rank order"""
+        return self.rankings[:limit]
+
+    def rank_of(self, student_id):
+        """Ranking entry for a student, or None if they are not on the board"""
+        return self._by_student.get(student_id)
+
+    def get_json(self):
+        return {
+            'total_students': self.total,
+            'rankings': self.rankings
+        }
+
 
 class Leaderboard:
     """
     Leaderboard - Service/Model for ranking students by total hours
-    Uses StudentRecord.totalHours for ranking calculations
+    Rankings come from RankingEngine and are shared between workers through the
+    SharedCache until the leaderboard DataVersion moves; single-student lookups
+    use the in-process RankIndex. Each cohort/department segment has its own
+    RankIndex, loaded from just that segment's LeaderboardEntry rows.
     """
-    
+
     def __init__(self):
         self._rankings = []
-    
+
+    @staticmethod
+    def index():
+        """
+        Get the process-wide RankIndex, loading it from LeaderboardEntry on first use
+        Commits from this worker are applied to it incrementally; when another
+        worker has moved the leaderboard version it catches up with _sync()
+        """
+        version = DataVersion.current('leaderboard')
+        index = current_app.extensions.get(INDEX_KEY)
+        if index is None or index.version != version:
+            index = Leaderboard._sync(index)
+            index.version = version
+            current_app.extensions[INDEX_KEY] = index
+        return index
+
+    @staticmethod
+    def _members(segment=None, value=None):
+        """(student_id, total_hours) query for the whole board or one segment"""
+        query = (
+            db.session.query(LeaderboardEntry.student_id, LeaderboardEntry.total_hours)
+            .join(Student, Student.student_id == LeaderboardEntry.student_id)
+        )
+        if segment is not None:
+            query = query.filter(getattr(LeaderboardEntry, segment) == value)
+        return query
+
+    @staticmethod
+    def _sync(index, segment=None, value=None):
+        """
+        Bring a RankIndex up to date with LeaderboardEntry
+        An existing index only reads the rows updated since it last synced;
+        deleted rows leave no trace there, so the members are counted and the
+        index is only rebuilt from scratch when the counts disagree.
+
+        Returns:
+            The index, or a new one if there was none or it had to be rebuilt
+        """
+        started = datetime.utcnow()
+        if index is not None and index.synced_at is not None:
+            changed = (
+                db.session.query(LeaderboardEntry.student_id, LeaderboardEntry.total_hours,
+                                 LeaderboardEntry.cohort, LeaderboardEntry.department)
+                .join(Student, Student.student_id == LeaderboardEntry.student_id)
+                .filter(LeaderboardEntry.updated_at >= index.synced_at - CATCH_UP_MARGIN)
+                .all()
+            )
+            for row in changed:
+                if segment is None or getattr(row, segment) == value:
+                    index.update(row.student_id, row.total_hours)
+                else:
+                    # Moved to another segment
+                    index.remove(row.student_id)
+            if Leaderboard._members(segment, value).count() == len(index):
+                index.synced_at = started
+                return index
+        index = RankIndex(Leaderboard._members(segment, value).all())
+        index.synced_at = started
+        return index
+
+    @staticmethod
+    def segment_index(segment, value):
+        """
+        Get the process-wide RankIndex for one segment, e.g. ('cohort', '2025')
+        Kept up to date like index(), but only ever holds the segment's students.
+        Values come from URLs, so segments with no students are not kept and
+        at most LEADERBOARD_SEGMENT_INDEX_LIMIT indexes are
+
+        Raises:
+            ValueError: if segment is not one of LeaderboardEntry.SEGMENTS
+        """
+        if segment not in LeaderboardEntry.SEGMENTS:
+            raise ValueError(f"Unknown leaderboard segment: {segment}")
+        version = DataVersion.current('leaderboard')
+        indexes = current_app.extensions.setdefault(SEGMENT_INDEX_KEY, OrderedDict())
+        key = (segment, value)
+        index = indexes.get(key)
+        if index is not None and index.version == version:
+            indexes.move_to_end(key)
+            return index
+        index = Leaderboard._sync(index, segment, value)
+        index.version = version
+        if not len(index):
+            # A student joining later is picked up by the next load
+            indexes.pop(key, None)
+            return index
+        indexes[key] = index
+        indexes.move_to_end(key)
+        limit = current_app.config.get('LEADERBOARD_SEGMENT_INDEX_LIMIT', SEGMENT_INDEX_LIMIT)
+        while len(indexes) > limit:
+            indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def snapshot():
+        """
+        Get the leaderboard snapshot for the current request
+        Built on first use and reused until the request ends or a total changes
+        """
+        snapshot = g.get(SNAPSHOT_KEY)
+        if snapshot is None:
+            snapshot = LeaderboardSnapshot(Leaderboard.recalculate_rankings())
+            setattr(g, SNAPSHOT_KEY, snapshot)
+        return snapshot
+
+    @staticmethod
+    def rankings(source='lifetime', allow_stale=None):
+        """
+        Full rankings for a RankingEngine source
+        Served from the SharedCache while the leaderboard version is unchanged.
+        Concurrent misses in a worker share one recomputation; with allow_stale
+        (default: the LEADERBOARD_STALE_WHILE_REVALIDATE setting) the previous
+        rankings are served while the new ones are computed in the background.
+        """
+        if allow_stale is None:
+            allow_stale = current_app.config.get('LEADERBOARD_STALE_WHILE_REVALIDATE', False)
+        name = f"leaderboard:{source}"
+        if source in RankingEngine.WINDOWS:
+            # Windows slide daily even when no hours are logged
+            name += f":{RankingEngine.window_start(source).isoformat()}"
+        token = DataVersion.token('leaderboard')
+        return get_cache().get_or_compute(
+            name,
+            token,
+            lambda: RankingEngine.rankings(source, with_accolades=True),
+            stale=(lambda cached: DataVersion.same_epoch(cached, token)) if allow_stale else None
+        )
+
     @staticmethod
     def recalculate_rankings():
         """
         Recalculate rankings based on StudentRecord.totalHours
         Returns a list of rankings sorted by total hours (descending)
         """
-        rankings = []
-        
-        students = Student.query.all()
-        
-        for student in students:
-            student_record = StudentRecord.query.filter_by(student_id=student.student_id).first()
-            
-            if student_record:
-                total_hours = student_record.total_hours
-            else:
-                total_hours = 0.0
-            
-            rankings.append({
-                'student_id': student.student_id,
-                'username': student.username,
-                'email': student.email,
-                'total_hours': total_hours,
-                'accolades': student_record.accolades if student_record else []
-            })
-        
-        rankings.sort(key=lambda x: x['total_hours'], reverse=True)
-        
-        for i, entry in enumerate(rankings, start=1):
-            entry['rank'] = i
-        
-        return rankings
-    
+        return Leaderboard.rankings('lifetime')
+
     @staticmethod
     def get_top_students(limit=10):
         """
         Get the top N students by total hours
-        
+
         Args:
             limit (int): Number of top students to return (default: 10)
-        
+
         Returns:
             List of top students with their rankings
         """
-        all_rankings = Leaderboard.recalculate_rankings()
-        return all_rankings[:limit]
-    
+        return Leaderboard.top(limit)
+
+    @staticmethod
+    def top(limit=10):
+        """
+        The first `limit` students, read off the RankIndex
+        Only that slice is built (one query for the students' details) and
+        shared between workers through the SharedCache until the leaderboard
+        version moves, so top-N never ranks or decodes the whole board
+        """
+        return get_cache().get_or_compute(
+            f"leaderboard:top:{limit}",
+            DataVersion.token('leaderboard'),
+            lambda: Leaderboard._entries_for(Leaderboard.index().after(None, limit))
+        )
+
     @staticmethod
     def get_student_rank(student_id):
         """
         Get a specific student's rank and stats
-        
+
         Args:
             student_id (int): The student's ID
-        
+
         Returns:
             dict with student's rank info, or None if not found
         """
-        rankings = Leaderboard.recalculate_rankings()
-        
-        for entry in rankings:
-            if entry['student_id'] == student_id:
-                return entry
-        
-        return None
-    
+        if student_id not in Leaderboard.index():
+            return None
+        return Leaderboard._entry_for(student_id)
+
     @staticmethod
-    def get_json():
-        """Get leaderboard data as JSON-serializable dict"""
-        rankings = Leaderboard.recalculate_rankings()
+    def get_student_at(position):
+        """
+        Get the student at a position on the leaderboard
+
+        Args:
+            position (int): 1-based position, ties ordered by student id
+
+        Returns:
+            dict with the student's rank info, or None if out of range
+        """
+        student_id = Leaderboard.index().at(position)
+        if student_id is None:
+            return None
+        return Leaderboard._entry_for(student_id)
+
+    @staticmethod
+    def page(cursor=None, limit=20):
+        """
+        Get one page of the leaderboard after a cursor
+
+        Args:
+            cursor (str): next_cursor from the previous page, or None for the top
+            limit (int): Number of students on the page
+
+        Returns:
+            dict with the page's rankings and the cursor for the next page (None at the end)
+
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        entries = Leaderboard.index().after(Leaderboard.decode_cursor(cursor), limit)
+        rankings = Leaderboard._entries_for(entries)
+        next_cursor = None
+        if len(entries) == limit:
+            _, student_id, total_hours = entries[-1]
+            next_cursor = Leaderboard.encode_cursor(total_hours, student_id)
         return {
-            'total_students': len(rankings),
-            'rankings': rankings
+            'leaderboard': rankings,
+            'next_cursor': next_cursor
         }
+
+    @staticmethod
+    def segment_page(segment, value, cursor=None, limit=20):
+        """
+        Get one page of a segment's leaderboard, ranked within the segment
+
+        Args:
+            segment (str): one of LeaderboardEntry.SEGMENTS
+            value (str): the cohort or department
+            cursor (str): next_cursor from the previous page, or None for the top
+            limit (int): Number of students on the page
+
+        Returns:
+            dict with the segment size, the page's rankings and the next cursor
+
+        Raises:
+            ValueError: if the segment or cursor is invalid
+        """
+        index = Leaderboard.segment_index(segment, value)
+        entries = index.after(Leaderboard.decode_cursor(cursor), limit)
+        next_cursor = None
+        if len(entries) == limit:
+            _, student_id, total_hours = entries[-1]
+            next_cursor = Leaderboard.encode_cursor(total_hours, student_id)
+        return {
+            'total_students': len(index),
+            'leaderboard': Leaderboard._entries_for(entries, index),
+            'next_cursor': next_cursor
+        }
+
+    @staticmethod
+    def get_segment_rank(student_id, segment, value):
+        """A student's rank within a segment, or None if they are not in it"""
+        index = Leaderboard.segment_index(segment, value)
+        if student_id not in index:
+            return None
+        return Leaderboard._entry_for(student_id, index)
+
+    @staticmethod
+    def around(student_id, k=5):
+        """
+        Get the students within k places of a student, including them
+
+        Args:
+            student_id (int): The student's ID
+            k (int): Number of neighbours to include on each side
+
+        Returns:
+            List of rankings in leaderboard order, empty if the student is not ranked
+        """
+        return Leaderboard._entries_for(Leaderboard.index().around(student_id, k))
+
+    @staticmethod
+    def encode_cursor(total_hours, student_id):
+        """Opaque cursor for the leaderboard key (total_hours, student_id)"""
+        raw = json.dumps([total_hours, student_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            total_hours, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(total_hours), int(student_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _entries_for(entries, index=None):
+        """
+        Ranking entries for (position, student_id, total_hours) tuples from a RankIndex
+        (the global one unless given). Student details for the whole batch are
+        loaded in one query
+        """
+        if not entries:
+            return []
+        if index is None:
+            index = Leaderboard.index()
+        student_ids = [student_id for _, student_id, _ in entries]
+        rows = (
+            db.session.query(Student, StudentRecord.accolades)
+            .outerjoin(StudentRecord, StudentRecord.student_id == Student.student_id)
+            .filter(Student.student_id.in_(student_ids))
+            .all()
+        )
+        details = {student.student_id: (student, accolades) for student, accolades in rows}
+        rankings = []
+        for position, student_id, total_hours in entries:
+            if student_id not in details:
+                continue
+            student, accolades = details[student_id]
+            rankings.append({
+                'student_id': student_id,
+                'username': student.username,
+                'email': student.email,
+                'total_hours': total_hours,
+                'rank': index.rank(student_id),
+                'dense_rank': index.dense_rank(student_id),
+                'position': position,
+                'accolades': accolades or []
+            })
+        return rankings
+
+    @staticmethod
+    def _entry_for(student_id, index=None):
+        """Ranking entry for one student, ranks taken from a RankIndex (the global one unless given)"""
+        student = db.session.get(Student, student_id)
+        if student is None:
+            return None
+        if index is None:
+            index = Leaderboard.index()
+        student_record = StudentRecord.query.filter_by(student_id=student_id).first()
+        return {
+            'student_id': student.student_id,
+            'username': student.username,
+            'email': student.email,
+            'total_hours': index.hours_of(student_id),
+            'rank': index.rank(student_id),
+            'dense_rank': index.dense_rank(student_id),
+            'accolades': student_record.accolades if student_record else []
+        }
+
+    @staticmethod
+    def get_total_students():
+        """Number of students on the leaderboard"""
+        return len(Leaderboard.index())
+
+    @staticmethod
+    def get_json():
+        """Get leaderboard data as JSON-serializable dict"""
+        return Leaderboard.snapshot().get_json()
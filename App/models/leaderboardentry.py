@@ -0,0 +1,239 @@
+from App.database import db
+from datetime import datetime
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+from .student import Student
+from .studentrecord import StudentRecord
+from .dataversion import DataVersion, BUMPS_KEY
+
+# flask.g key holding the per-request Leaderboard snapshot
+SNAPSHOT_KEY = 'leaderboard_snapshot'
+# app.extensions key holding the process-wide RankIndex
+INDEX_KEY = 'leaderboard_index'
+# app.extensions key holding the process-wide {(segment, value): RankIndex}
+SEGMENT_INDEX_KEY = 'leaderboard_segment_indexes'
+# session.info key for totals written but not yet committed
+PENDING_KEY = 'leaderboard_pending'
+# session.info key for students whose segments changed but are not yet committed
+MOVED_KEY = 'leaderboard_moved'
+
+class LeaderboardEntry(db.Model):
+    """
+    LeaderboardEntry - Persisted ranking row, one per student
+    Kept in step with StudentRecord.total_hours so the leaderboard is read
+    off the (total_hours, student_id) index instead of being recomputed.
+    The student's segments are copied here so a segment's ranking is read
+    off its own (segment, total_hours, student_id) index.
+    """
+    __tablename__ = "leaderboard_entry"
+
+    student_id = db.Column(db.Integer, db.ForeignKey('student.student_id', ondelete='CASCADE'), primary_key=True)
+    total_hours = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    cohort = db.Column(db.String(50), nullable=True)
+    department = db.Column(db.String(100), nullable=True)
+
+    # Student columns a leaderboard can be segmented by
+    SEGMENTS = ('cohort', 'department')
+
+    __table_args__ = (
+        # Matches the leaderboard ordering: most hours first, ties by student id
+        db.Index('ix_leaderboard_entry_rank', total_hours.desc(), student_id),
+        db.Index('ix_leaderboard_entry_cohort_rank', cohort, total_hours.desc(), student_id),
+        db.Index('ix_leaderboard_entry_department_rank', department, total_hours.desc(), student_id),
+        # Rows changed since a worker's RankIndex last synced
+        db.Index('ix_leaderboard_entry_updated_at', updated_at),
+    )
+
+    def __init__(self, student_id, total_hours=0.0, cohort=None, department=None):
+        self.student_id = student_id
+        self.total_hours = total_hours
+        self.cohort = cohort
+        self.department = department
+
+    def get_json(self):
+        return {
+            'student_id': self.student_id,
+            'total_hours': self.total_hours,
+            'cohort': self.cohort,
+            'department': self.department,
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f"[LeaderboardEntry Student={self.student_id} Hours={self.total_hours}]"
+
+    @staticmethod
+    def sync(connection, student_id, total_hours=None, segments=None):
+        """
+        Upsert the ranking row for a student
+        Runs on the flushing connection so it commits (or rolls back) with the change
+
+        Args:
+            total_hours (float): new total, or None to leave it unchanged
+            segments (dict): new {segment: value} for the student, or None to leave them
+        """
+        table = LeaderboardEntry.__table__
+        values = dict(segments or {}, updated_at=datetime.utcnow())
+        if total_hours is not None:
+            values['total_hours'] = total_hours
+        result = connection.execute(
+            table.update().where(table.c.student_id == student_id).values(**values)
+        )
+        if result.rowcount == 0:
+            values.setdefault('total_hours', 0.0)
+            connection.execute(table.insert().values(student_id=student_id, **values))
+        if has_app_context():
+            # Any snapshot taken earlier in this request no longer matches the table
+            g.pop(SNAPSHOT_KEY, None)
+
+    @staticmethod
+    def record_total(record, total_hours):
+        """Sync the row for a StudentRecord total written outside the ORM (an SQL increment)"""
+        _entry_changed(db.session.connection(), record, record.student_id, total_hours)
+
+    @staticmethod
+    def rebuild():
+        """
+        Repopulate the table from Student/StudentRecord
+        Used to backfill databases created before the table existed
+        """
+        table = LeaderboardEntry.__table__
+        now = datetime.utcnow()
+        rows = (
+            db.session.query(Student.student_id, StudentRecord.total_hours, Student.cohort, Student.department)
+            .outerjoin(StudentRecord, StudentRecord.student_id == Student.student_id)
+            .all()
+        )
+        db.session.execute(table.delete())
+        DataVersion.touch(db.session, 'leaderboard')
+        if rows:
+            db.session.execute(table.insert(), [
+                {
+                    'student_id': student_id,
+                    'total_hours': total_hours or 0.0,
+                    'cohort': cohort,
+                    'department': department,
+                    'updated_at': now
+                }
+                for student_id, total_hours, cohort, department in rows
+            ])
+        db.session.commit()
+        if has_app_context():
+            current_app.extensions.pop(INDEX_KEY, None)
+            current_app.extensions.pop(SEGMENT_INDEX_KEY, None)
+        return len(rows)
+
+
+def _segments_of(student):
+    return {segment: getattr(student, segment) for segment in LeaderboardEntry.SEGMENTS}
+
+def _entry_changed(connection, target, student_id, total_hours, segments=None):
+    """
+    Write the ranking row and queue the change for the RankIndexes
+    total_hours None deletes the row; segments are only passed when they changed
+    """
+    if total_hours is None:
+        connection.execute(
+            LeaderboardEntry.__table__.delete().where(LeaderboardEntry.__table__.c.student_id == student_id)
+        )
+    else:
+        LeaderboardEntry.sync(connection, student_id, total_hours, segments)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, {})[student_id] = total_hours
+        if segments is not None:
+            session.info.setdefault(MOVED_KEY, {})[student_id] = segments
+
+
+# Students without a StudentRecord still rank, with 0 hours
+@event.listens_for(Student, 'after_insert')
+def _student_inserted(mapper, connection, target):
+    _entry_changed(connection, target, target.student_id, 0.0, _segments_of(target))
+
+@event.listens_for(Student, 'after_update')
+def _student_updated(mapper, connection, target):
+    if any(get_history(target, segment).has_changes() for segment in LeaderboardEntry.SEGMENTS):
+        segments = _segments_of(target)
+        LeaderboardEntry.sync(connection, target.student_id, segments=segments)
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(MOVED_KEY, {})[target.student_id] = segments
+
+@event.listens_for(Student, 'after_delete')
+def _student_deleted(mapper, connection, target):
+    _entry_changed(connection, target, target.student_id, None)
+
+@event.listens_for(StudentRecord, 'after_insert')
+def _record_inserted(mapper, connection, target):
+    _entry_changed(connection, target, target.student_id, target.total_hours or 0.0)
+
+# Fires for direct assignments to total_hours; add_hours() increments in SQL and calls record_total()
+@event.listens_for(StudentRecord, 'after_update')
+def _record_updated(mapper, connection, target):
+    if get_history(target, 'total_hours').has_changes():
+        _entry_changed(connection, target, target.student_id, target.total_hours)
+
+@event.listens_for(StudentRecord, 'after_delete')
+def _record_deleted(mapper, connection, target):
+    _entry_changed(connection, target, target.student_id, 0.0)
+
+
+def _apply_totals(index, pending):
+    for student_id, total_hours in pending.items():
+        if total_hours is None:
+            index.remove(student_id)
+        else:
+            index.update(student_id, total_hours)
+
+def _apply_segment(index, segment, value, pending, moved):
+    """
+    Apply committed changes to one segment's index
+    Returns False when a student joined the segment with a total the index
+    cannot know, in which case the index has to be reloaded
+    """
+    for student_id, segments in moved.items():
+        if segments[segment] != value:
+            index.remove(student_id)
+        elif student_id not in index:
+            if pending.get(student_id) is None:
+                return False
+            index.update(student_id, pending[student_id])
+    # Members are exactly the students already in the index
+    _apply_totals(index, {
+        student_id: total_hours for student_id, total_hours in pending.items()
+        if student_id in index
+    })
+    return True
+
+
+# Committed totals are applied to the in-process RankIndexes, rolled back ones dropped
+@event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    pending = session.info.pop(PENDING_KEY, None) or {}
+    moved = session.info.pop(MOVED_KEY, None) or {}
+    if not has_app_context():
+        return
+    # If no other worker committed in between, an index now matches the new version;
+    # otherwise it stays behind and Leaderboard reloads it on next use
+    bumps = session.info.get(BUMPS_KEY, {}).get('leaderboard')
+
+    index = current_app.extensions.get(INDEX_KEY)
+    if index is not None:
+        _apply_totals(index, pending)
+        if bumps and index.version == (bumps[0], bumps[1]):
+            index.version = (bumps[0], bumps[2])
+
+    segment_indexes = current_app.extensions.get(SEGMENT_INDEX_KEY, {})
+    for (segment, value), segment_index in list(segment_indexes.items()):
+        if not _apply_segment(segment_index, segment, value, pending, moved):
+            segment_indexes.pop((segment, value), None)
+        elif bumps and segment_index.version == (bumps[0], bumps[1]):
+            segment_index.version = (bumps[0], bumps[2])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(MOVED_KEY, None)
@@ -10,6 +10,11 @@ class LoggedHours(db.Model):
     status = db.Column(db.String(20), nullable=False, default='approved')
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # A student's approved hours are summed by (student_id, status)
+        db.Index('ix_logged_hours_student_status', 'student_id', 'status'),
+    )
+
     def __init__(self, student_id, staff_id, hours, status='approved'):
         self.student_id = student_id
         self.staff_id = staff_id
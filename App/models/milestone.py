@@ -0,0 +1,148 @@
+from bisect import bisect_right
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm.attributes import flag_modified
+from App.database import db, unit_of_work
+
+# app.extensions key holding the loaded MilestoneTable
+TABLE_KEY = 'milestone_table'
+
+class MilestoneTable:
+    """
+    MilestoneTable - The hour thresholds that earn an accolade
+    Loaded once per app from the MILESTONES setting, a list of
+    (hours, name) pairs, and kept sorted so the milestones crossed between
+    two totals are found with a bisect
+    """
+
+    DEFAULT = (
+        (10, '10 Hours Milestone'),
+        (25, '25 Hours Milestone'),
+        (50, '50 Hours Milestone'),
+    )
+
+    def __init__(self, milestones=DEFAULT):
+        rows = sorted((float(hours), name) for hours, name in milestones)
+        self.thresholds = [hours for hours, _ in rows]
+        self.names = [name for _, name in rows]
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    @staticmethod
+    def current():
+        """The app's table, loaded from config on first use"""
+        if not has_app_context():
+            return MilestoneTable()
+        table = current_app.extensions.get(TABLE_KEY)
+        if table is None:
+            table = MilestoneTable(current_app.config.get('MILESTONES') or MilestoneTable.DEFAULT)
+            current_app.extensions[TABLE_KEY] = table
+        return table
+
+    def crossed(self, old_total, new_total):
+        """(hours, name) of every milestone reached going from old_total to new_total"""
+        start = bisect_right(self.thresholds, old_total)
+        stop = bisect_right(self.thresholds, new_total)
+        return list(zip(self.thresholds[start:stop], self.names[start:stop]))
+
+    def earned(self, total):
+        """(hours, name) of every milestone at or below total"""
+        return self.crossed(float('-inf'), total)
+
+    def award(self, record, old_total=None):
+        """
+        Add the milestones a record has reached but not been given
+        With old_total only those crossed since then are checked; without it
+        every milestone up to the record's total is (re-evaluation)
+        Returns the (hours, name) pairs awarded
+        """
+        from .activityentry import ActivityEntry
+
+        if old_total is None:
+            reached = self.earned(record.total_hours)
+        else:
+            reached = self.crossed(old_total, record.total_hours)
+        awarded = [(hours, name) for hours, name in reached if name not in record.accolades]
+        if not awarded:
+            return []
+        with unit_of_work():
+            for hours, name in awarded:
+                record.accolades.append(name)
+                db.session.add(ActivityEntry(
+                    student_record_id=record.id,
+                    hours=0,
+                    logged_by="System",
+                    description=f"Milestone achieved: {name}"
+                ))
+            # In-place changes to the JSON column are not tracked on their own
+            flag_modified(record, 'accolades')
+        return awarded
+
+    def reevaluate_all(self, chunk_size=500):
+        """
+        Award any missing milestones to every StudentRecord, e.g. after MILESTONES changed
+        Records are streamed in id order chunk_size at a time; each chunk's
+        accolades and milestone ActivityEntry rows are written with one bulk
+        update and one bulk insert, then committed, so memory stays bounded
+
+        Returns:
+            dict with the number of records scanned, records updated and milestones awarded
+        """
+        from .studentrecord import StudentRecord
+        from .activityentry import ActivityEntry
+        from .dataversion import DataVersion
+
+        records = StudentRecord.__table__
+        entries = ActivityEntry.__table__
+        update_accolades = (
+            records.update()
+            .where(records.c.id == bindparam('record_id'))
+            .values(accolades=bindparam('new_accolades'))
+        )
+        counts = {'scanned': 0, 'updated': 0, 'awarded': 0}
+        last_id = 0
+        while True:
+            # One transaction per chunk, committed whether or not it changed
+            # anything, so its row locks never outlive the chunk
+            with unit_of_work():
+                rows = db.session.execute(
+                    select(records.c.id, records.c.total_hours, records.c.accolades)
+                    .where(records.c.id > last_id)
+                    .order_by(records.c.id)
+                    .limit(chunk_size)
+                    # Hold the chunk until commit so a concurrent add_hours can't
+                    # write accolades between this read and the bulk update
+                    .with_for_update()
+                ).all()
+                if not rows:
+                    return counts
+                last_id = rows[-1].id
+                counts['scanned'] += len(rows)
+
+                now = datetime.utcnow()
+                updates, new_entries = [], []
+                for record_id, total_hours, accolades in rows:
+                    accolades = accolades or []
+                    # Names of every milestone at or below the total
+                    earned = self.names[:bisect_right(self.thresholds, total_hours or 0.0)]
+                    missing = [name for name in earned if name not in accolades]
+                    if not missing:
+                        continue
+                    updates.append({'record_id': record_id, 'new_accolades': accolades + missing})
+                    new_entries.extend({
+                        'student_record_id': record_id,
+                        'hours': 0,
+                        'description': f"Milestone achieved: {name}",
+                        'logged_by': "System",
+                        'timestamp': now
+                    } for name in missing)
+
+                if updates:
+                    db.session.execute(update_accolades, updates)
+                    db.session.execute(entries.insert(), new_entries)
+                    # Core writes skip the flush hooks; accolades are shown on the leaderboard
+                    DataVersion.touch(db.session, 'leaderboard')
+            counts['updated'] += len(updates)
+            counts['awarded'] += len(new_entries)
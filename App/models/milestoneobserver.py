@@ -1,35 +1,33 @@
-from App.database import db
 from .observer import Observer 
-from .activityentry import ActivityEntry
-from datetime import datetime
-from sqlalchemy.orm.attributes import flag_modified
+from .observerregistry import HOURS_ADDED, MILESTONE_REACHED
+from .milestone import MilestoneTable
 
 class MilestoneObserver(Observer):
+  """
+  Awards milestones from the app's MilestoneTable
+  Every threshold crossed by an update is awarded, not just one landed on exactly
+  """
 
-  def __init__(self):
-    self.milestones = {
-      10: "Bronze",
-      25: "Silver",
-      50: "Gold"
-    }
+  def __init__(self, table=None):
+    # None: use the app's table, so a changed MILESTONES setting is picked up
+    self.table = table
+
+  @property
+  def milestones(self):
+    return self.table or MilestoneTable.current()
 
   def checkMilestone(self, total_hours):
-     return self.milestones.get(total_hours)
+    """Name of the highest milestone reached at total_hours, or None"""
+    earned = self.milestones.earned(total_hours)
+    return earned[-1][1] if earned else None
 
   def update(self, record):
-    milestone = self.checkMilestone(record.total_hours)
-    if milestone is None:
-      return
-    if milestone not in record.accolades:
-      record.accolades.append(milestone)
+    self._award(record)
+
+  def on_event(self, event, record, **details):
+    if event == HOURS_ADDED:
+      self._award(record, details.get('old_total'))
 
-      entry = ActivityEntry(
-        student_record_id = record.id,
-        date=datetime.now(),
-        hours = 0,
-        logged_by = "System",
-        description = f"Milestone achieved: {milestone}"
-      )
-      db.session.add(record)
-      db.session.add(entry)
-      db.session.commit()
+  def _award(self, record, old_total=None):
+    for hours, name in self.milestones.award(record, old_total):
+      record.notify_observers(MILESTONE_REACHED, milestone=name, threshold=hours)
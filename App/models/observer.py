@@ -1,7 +1,15 @@
 from abc import ABC, abstractmethod
+from .observerregistry import HOURS_ADDED
 
 class Observer(ABC):
+    # ObserverRegistry events this observer receives by default
+    events = (HOURS_ADDED,)
+
     @abstractmethod
     def update(self, record):
         """Called when a student record is updated"""
         pass
+
+    def on_event(self, event, record, **details):
+        """Called by the ObserverRegistry; observers that only care about the record use update()"""
+        self.update(record)
@@ -0,0 +1,123 @@
+import time
+from threading import Lock
+from flask import current_app, has_app_context
+
+# Events dispatched by StudentRecord
+HOURS_ADDED = 'hours_added'
+MILESTONE_REACHED = 'milestone_reached'
+
+# app.extensions key holding the process-wide ObserverRegistry
+REGISTRY_KEY = 'observer_registry'
+
+class ObserverRegistry:
+    """
+    ObserverRegistry - Process-wide observers for StudentRecord events
+    Records loaded from the database have no attached observers, so the
+    pipeline is wired here once at startup and every record dispatches to it.
+    Observers run in priority order (then registration order) and the time
+    spent in each is recorded per event.
+
+    In 'outbox' mode published events are written to the OutboxEvent table in
+    the caller's transaction and dispatched later by the outbox worker;
+    in 'inline' mode they are dispatched straight away.
+    """
+
+    EVENTS = (HOURS_ADDED, MILESTONE_REACHED)
+    MODES = ('inline', 'outbox')
+
+    def __init__(self, mode='inline'):
+        if mode not in ObserverRegistry.MODES:
+            raise ValueError(f"Unknown outbox mode: {mode}")
+        self.mode = mode
+        self._subscriptions = {event: [] for event in ObserverRegistry.EVENTS}
+        self._timings = {}
+        self._lock = Lock()
+        self._registered = 0
+
+    def subscribe(self, observer, events=None, priority=100):
+        """
+        Register an observer
+
+        Args:
+            observer: Observer instance
+            events: event names to receive, defaults to observer.events
+            priority (int): lower runs first
+        """
+        events = events or observer.events
+        for event in events:
+            if event not in self._subscriptions:
+                raise ValueError(f"Unknown observer event: {event}")
+        with self._lock:
+            self._registered += 1
+            for event in events:
+                self._subscriptions[event].append((priority, self._registered, observer))
+                self._subscriptions[event].sort(key=lambda subscription: subscription[:2])
+
+    def unsubscribe(self, observer):
+        with self._lock:
+            for event, subscriptions in self._subscriptions.items():
+                self._subscriptions[event] = [s for s in subscriptions if s[2] is not observer]
+
+    def observers(self, event):
+        return [observer for _, _, observer in self._subscriptions.get(event, [])]
+
+    def publish(self, event, record, **details):
+        """Deliver an event now or through the outbox, depending on the mode"""
+        if self.mode == 'outbox':
+            from .outboxevent import OutboxEvent
+            OutboxEvent.enqueue(record, event, **details)
+        else:
+            self.dispatch(event, record, **details)
+
+    def dispatch(self, event, record, **details):
+        """Call every observer subscribed to event, in order"""
+        for observer in self.observers(event):
+            start = time.perf_counter()
+            try:
+                observer.on_event(event, record, **details)
+            finally:
+                self._record(observer, event, (time.perf_counter() - start) * 1000)
+
+    def _record(self, observer, event, elapsed_ms):
+        name = type(observer).__name__
+        with self._lock:
+            timing = self._timings.setdefault(name, {}).setdefault(
+                event, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            )
+            timing['calls'] += 1
+            timing['total_ms'] += elapsed_ms
+            timing['max_ms'] = max(timing['max_ms'], elapsed_ms)
+
+    def timings(self):
+        """Dispatch count, total and max milliseconds per observer and event"""
+        with self._lock:
+            return {
+                name: {
+                    event: dict(timing, avg_ms=timing['total_ms'] / timing['calls'])
+                    for event, timing in events.items()
+                }
+                for name, events in self._timings.items()
+            }
+
+
+def init_observers(app):
+    """
+    Wire the default observer pipeline for the app
+    Observers run inline unless OUTBOX_MODE is 'outbox'; the outbox worker
+    (App.outbox.start_worker) switches the registry to 'outbox' when it starts,
+    so events are never queued in a process where nothing drains them
+    """
+    from .milestoneobserver import MilestoneObserver
+    from .activityhistoryobserver import ActivityHistoryObserver
+
+    registry = ObserverRegistry(app.config.get('OUTBOX_MODE') or 'inline')
+    registry.subscribe(MilestoneObserver(), priority=10)
+    registry.subscribe(ActivityHistoryObserver(), priority=20)
+    app.extensions[REGISTRY_KEY] = registry
+    return registry
+
+def get_observer_registry():
+    """The app's ObserverRegistry, or None outside an app or before init_observers"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(REGISTRY_KEY)
@@ -0,0 +1,64 @@
+from App.database import db
+from datetime import datetime
+
+class OutboxEvent(db.Model):
+    """
+    OutboxEvent - A StudentRecord event waiting to be delivered to observers
+    Written in the same transaction as the change that raised it, then
+    dispatched by the outbox worker, so observer side effects happen at least
+    once without running inside the request that caused them
+    """
+    __tablename__ = "outbox_event"
+
+    id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(50), nullable=False)
+    student_record_id = db.Column(db.Integer, db.ForeignKey('student_record.id', ondelete='CASCADE'), nullable=False)
+    payload = db.Column(db.JSON, default=dict, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Not before this time: set on claim (lease) and on failure (backoff)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(500), nullable=True)
+
+    __table_args__ = (
+        # The worker polls for pending events that are due, oldest first
+        db.Index('ix_outbox_event_due', 'status', 'available_at', 'id'),
+    )
+
+    def __init__(self, event, student_record_id, payload=None):
+        now = datetime.utcnow()
+        self.event = event
+        self.student_record_id = student_record_id
+        self.payload = payload or {}
+        self.status = 'pending'
+        self.attempts = 0
+        self.available_at = now
+        self.created_at = now
+
+    def get_json(self):
+        return {
+            'id': self.id,
+            'event': self.event,
+            'student_record_id': self.student_record_id,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'available_at': self.available_at.isoformat(),
+            'created_at': self.created_at.isoformat(),
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+            'last_error': self.last_error
+        }
+
+    def __repr__(self):
+        return f"[OutboxEvent ID={self.id} Event={self.event} Record={self.student_record_id} Status={self.status}]"
+
+    @staticmethod
+    def enqueue(record, event, **details):
+        """Stage an event for a record in the current transaction"""
+        if record.id is None:
+            db.session.flush()
+        entry = OutboxEvent(event, record.id, details)
+        db.session.add(entry)
+        return entry
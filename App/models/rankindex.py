@@ -0,0 +1,124 @@
+from bisect import bisect_left, bisect_right, insort
+from threading import RLock
+
+class RankIndex:
+    """
+    RankIndex - Order-statistics index over students' total hours
+    Keys are kept sorted as (-total_hours, student_id), i.e. leaderboard order,
+    so "what is X's rank" and "who is at rank k" are answered with a bisect
+    """
+
+    def __init__(self, entries=()):
+        """
+        Args:
+            entries: iterable of (student_id, total_hours) pairs
+        """
+        self._hours = {student_id: total_hours for student_id, total_hours in entries}
+        self._keys = sorted((-total_hours, student_id) for student_id, total_hours in self._hours.items())
+        # Distinct totals (negated, sorted) with how many students hold each, for dense ranks
+        self._counts = {}
+        for total_hours in self._hours.values():
+            self._counts[-total_hours] = self._counts.get(-total_hours, 0) + 1
+        self._values = sorted(self._counts)
+        self._lock = RLock()
+        # DataVersion (epoch, version) of the leaderboard this index reflects
+        self.version = None
+        # When the index last read LeaderboardEntry; catch-ups read rows updated since
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, student_id):
+        return student_id in self._hours
+
+    def hours_of(self, student_id):
+        return self._hours.get(student_id)
+
+    def update(self, student_id, total_hours):
+        """Insert a student or move them to their new total"""
+        with self._lock:
+            self._discard(student_id)
+            insort(self._keys, (-total_hours, student_id))
+            self._hours[student_id] = total_hours
+            if -total_hours not in self._counts:
+                insort(self._values, -total_hours)
+            self._counts[-total_hours] = self._counts.get(-total_hours, 0) + 1
+
+    def remove(self, student_id):
+        with self._lock:
+            self._discard(student_id)
+
+    def _discard(self, student_id):
+        old_hours = self._hours.pop(student_id, None)
+        if old_hours is not None:
+            i = bisect_left(self._keys, (-old_hours, student_id))
+            del self._keys[i]
+            self._counts[-old_hours] -= 1
+            if self._counts[-old_hours] == 0:
+                del self._counts[-old_hours]
+                del self._values[bisect_left(self._values, -old_hours)]
+
+    def position(self, student_id):
+        """1-based position in leaderboard order (ties broken by student id), or None"""
+        with self._lock:
+            hours = self._hours.get(student_id)
+            if hours is None:
+                return None
+            return bisect_left(self._keys, (-hours, student_id)) + 1
+
+    def rank(self, student_id):
+        """1-based competition rank: students with equal hours share a rank, or None"""
+        with self._lock:
+            hours = self._hours.get(student_id)
+            if hours is None:
+                return None
+            # (-hours,) sorts before every (-hours, student_id) key
+            return bisect_left(self._keys, (-hours,)) + 1
+
+    def dense_rank(self, student_id):
+        """1-based dense rank: the number of distinct higher totals plus one, or None"""
+        with self._lock:
+            hours = self._hours.get(student_id)
+            if hours is None:
+                return None
+            return bisect_left(self._values, -hours) + 1
+
+    def at(self, position):
+        """Student id at a 1-based position, or None if out of range"""
+        with self._lock:
+            if position < 1 or position > len(self._keys):
+                return None
+            return self._keys[position - 1][1]
+
+    def slice(self, start, stop):
+        """Student ids for 1-based positions start..stop inclusive"""
+        with self._lock:
+            return [student_id for _, student_id in self._keys[max(start, 1) - 1:max(stop, 0)]]
+
+    def after(self, key, limit):
+        """
+        Keyset page: up to `limit` (position, student_id, total_hours) entries
+        that come after key = (total_hours, student_id) in leaderboard order,
+        or from the top when key is None
+        """
+        with self._lock:
+            start = 0 if key is None else bisect_right(self._keys, (-key[0], key[1]))
+            return [
+                (position, key_student_id, -negated_hours)
+                for position, (negated_hours, key_student_id)
+                in enumerate(self._keys[start:start + limit], start=start + 1)
+            ]
+
+    def around(self, student_id, k):
+        """(position, student_id, total_hours) entries within k positions of a student"""
+        with self._lock:
+            position = self.position(student_id)
+            if position is None:
+                return []
+            start = max(position - k, 1)
+            return [
+                (key_position, key_student_id, -negated_hours)
+                for key_position, (negated_hours, key_student_id)
+                in enumerate(self._keys[start - 1:position + k], start=start)
+            ]
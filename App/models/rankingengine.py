@@ -0,0 +1,131 @@
+from datetime import date, datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import func, select
+from App.database import db
+from .student import Student
+from .studentrecord import StudentRecord
+from .loggedhours import LoggedHours
+from .leaderboardentry import LeaderboardEntry
+from .activitybucket import ActivityBucket
+
+class RankingEngine:
+    """
+    RankingEngine - The one place students are ranked
+    Totals are aggregated in the database (GROUP BY/SUM) and ranked there with
+    RANK() and DENSE_RANK() window functions, which SQLite and Postgres both support.
+    Students with equal hours share a rank; ties are listed by student id.
+
+    Sources:
+        lifetime - StudentRecord totals, read from the LeaderboardEntry table
+        approved - sum of approved LoggedHours
+        week, month, term - activity hours since the window start, summed
+                            from the daily ActivityBucket rows
+    """
+
+    # Rolling windows, in days including today
+    WINDOW_DAYS = {'week': 7, 'month': 30}
+    WINDOWS = ('week', 'month', 'term')
+    SOURCES = ('lifetime', 'approved') + WINDOWS
+
+    # Terms start on these (month, day) dates unless TERM_START is configured
+    TERM_STARTS = ((1, 1), (6, 1), (9, 1))
+
+    @staticmethod
+    def window_start(window, today=None):
+        """First day counted by a windowed ranking"""
+        today = today or datetime.utcnow().date()
+        if window in RankingEngine.WINDOW_DAYS:
+            return today - timedelta(days=RankingEngine.WINDOW_DAYS[window] - 1)
+        if window == 'term':
+            configured = current_app.config.get('TERM_START') if has_app_context() else None
+            if configured:
+                return configured if isinstance(configured, date) else date.fromisoformat(configured)
+            return max(
+                date(today.year, month, day)
+                for month, day in RankingEngine.TERM_STARTS
+                if date(today.year, month, day) <= today
+            )
+        raise ValueError(f"Unknown ranking window: {window}")
+
+    @staticmethod
+    def totals(source='lifetime'):
+        """Select (student_id, total_hours) for a ranking source"""
+        if source == 'lifetime':
+            return select(
+                LeaderboardEntry.student_id.label('student_id'),
+                LeaderboardEntry.total_hours.label('total_hours')
+            )
+        if source == 'approved':
+            return (
+                select(
+                    LoggedHours.student_id.label('student_id'),
+                    func.sum(LoggedHours.hours).label('total_hours')
+                )
+                .where(LoggedHours.status == 'approved')
+                .group_by(LoggedHours.student_id)
+            )
+        if source in RankingEngine.WINDOWS:
+            return (
+                select(
+                    StudentRecord.student_id.label('student_id'),
+                    func.sum(ActivityBucket.hours).label('total_hours')
+                )
+                .select_from(ActivityBucket)
+                .join(StudentRecord, StudentRecord.id == ActivityBucket.student_record_id)
+                .where(ActivityBucket.day >= RankingEngine.window_start(source))
+                .group_by(StudentRecord.student_id)
+            )
+        raise ValueError(f"Unknown ranking source: {source}")
+
+    @staticmethod
+    def ranked(source='lifetime', with_accolades=False):
+        """
+        Build the ranking statement for a source
+        Every student is included; those without hours rank with 0
+        """
+        totals = RankingEngine.totals(source).subquery()
+        hours = func.coalesce(totals.c.total_hours, 0.0)
+        columns = [
+            Student.student_id,
+            Student.username,
+            Student.email,
+            hours.label('total_hours'),
+            func.rank().over(order_by=hours.desc()).label('rank'),
+            func.dense_rank().over(order_by=hours.desc()).label('dense_rank'),
+        ]
+        if with_accolades:
+            columns.append(StudentRecord.accolades)
+
+        stmt = (
+            select(*columns)
+            .select_from(Student)
+            .outerjoin(totals, totals.c.student_id == Student.student_id)
+            .order_by(hours.desc(), Student.student_id)
+        )
+        if with_accolades:
+            stmt = stmt.outerjoin(StudentRecord, StudentRecord.student_id == Student.student_id)
+        return stmt
+
+    @staticmethod
+    def rankings(source='lifetime', limit=None, with_accolades=False):
+        """
+        Run the ranking for a source
+
+        Args:
+            source (str): one of RankingEngine.SOURCES
+            limit (int): only return the first `limit` rows, or all if None
+            with_accolades (bool): include each student's accolades
+
+        Returns:
+            List of dicts with student_id, username, email, total_hours, rank, dense_rank
+        """
+        stmt = RankingEngine.ranked(source, with_accolades)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        rankings = []
+        for row in db.session.execute(stmt):
+            entry = dict(row._mapping)
+            if with_accolades:
+                entry['accolades'] = entry['accolades'] or []
+            rankings.append(entry)
+        return rankings
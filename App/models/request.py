@@ -1,5 +1,15 @@
-from App.database import db
-from datetime import datetime
+import base64
+import json
+from App.database import db, unit_of_work
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm.exc import StaleDataError
+
+
+class RequestConflict(Exception):
+    """Raised when a request was changed by someone else since it was loaded"""
+    pass
+
 
 class Request(db.Model):
     
@@ -12,6 +22,33 @@ class Request(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     hours = db.Column(db.Float, nullable=False)
     description = db.Column(db.String(500), nullable=True)
+    # When the request was approved, denied or canceled; archiving ages on this
+    decided_at = db.Column(db.DateTime, nullable=True)
+    # Reviewer lease: the staff member working on a pending request, until when
+    claimed_by = db.Column(db.Integer, db.ForeignKey('staff.staff_id'), nullable=True)
+    claim_expires_at = db.Column(db.DateTime, nullable=True)
+    # Bumped by every ORM update, which only applies WHERE version matches the loaded one
+    version = db.Column(db.Integer, nullable=False)
+
+    __mapper_args__ = {
+        'version_id_col': version
+    }
+
+    # Default and longest reviewer lease, in seconds
+    LEASE_SECONDS = 300
+    MAX_LEASE_SECONDS = 3600
+
+    # Statuses a request never leaves; these are moved to requests_archive once old
+    CLOSED_STATUSES = ('approved', 'denied', 'canceled')
+
+    __table_args__ = (
+        # The pending queue: filtered by status, read oldest first in (timestamp, requestID) order
+        db.Index('ix_requests_status_timestamp', 'status', 'timestamp', 'requestID'),
+        # A student's requests, optionally by status
+        db.Index('ix_requests_student_status', 'studentID', 'status'),
+        # Archived ids must never be handed out again, even when the newest row was moved
+        {'sqlite_autoincrement': True},
+    )
 
     def __init__(self, studentID=None, hours=None, description=None, status='pending', student_id=None):
         self.studentID = studentID if studentID is not None else student_id
@@ -43,11 +80,33 @@ class Request(db.Model):
             'studentID': self.studentID,
             'staffID': self.staffID,
             'status': self.status,
+            'version': self.version,
             'timestamp': self.timestamp.isoformat(),
             'hours': self.hours,
-            'description': self.description
+            'description': self.description,
+            'decided_at': self.decided_at.isoformat() if self.decided_at else None,
+            'claimed_by': self.claimed_by,
+            'claim_expires_at': self.claim_expires_at.isoformat() if self.claim_expires_at else None
         }
 
+    @staticmethod
+    def find(request_id):
+        """A request by id, live or archived, or None"""
+        from App.models.archivedrequest import ArchivedRequest
+
+        return db.session.get(Request, request_id) or db.session.get(ArchivedRequest, request_id)
+
+    @staticmethod
+    def for_student(student_id):
+        """A student's live and archived requests, oldest first"""
+        from App.models.archivedrequest import ArchivedRequest
+
+        requests = (
+            Request.query.filter_by(studentID=student_id).all()
+            + ArchivedRequest.query.filter_by(studentID=student_id).all()
+        )
+        return sorted(requests, key=lambda req: req.requestID)
+
     def submit(self):
         
         """Submit a new request (student creates request)"""
@@ -62,34 +121,39 @@ class Request(db.Model):
         
         """
         staff accepts the request, this triggers studentRecord.add_hours() → observer pipeline
+        The whole pipeline is one unit of work: a single commit for the approval
         """
         
         if self.status != 'pending':
             raise ValueError("Only pending requests can be approved")
+        if self.claimed_by_other(staff):
+            raise ValueError("Request is claimed by another reviewer")
 
         # imported here to avoid circular import
         from App.models.studentrecord import StudentRecord
 
-        self.status = 'approved'
-        self.staffID = staff.staff_id
+        with unit_of_work():
+            self.status = 'approved'
+            self.staffID = staff.staff_id
+            self.decided_at = datetime.utcnow()
+            # Claim the transition before any hours are added
+            self._flush_transition()
 
-        # get/create StudentRecord
-        student_record = StudentRecord.query.filter_by(student_id=self.studentID).first()
-        
-        if not student_record:
-            # creates new student record if it doesn't exist
-            student_record = StudentRecord(student_id=self.studentID)
-            db.session.add(student_record)
-            db.session.flush()
-        
-        # triggers the Observer pipeline , observers are attached globally
-        student_record.add_hours(
-            hours=self.hours,
-            description=self.description or f"Request #{self.requestID} approved",
-            logged_by=staff.username
-        )
-        
-        db.session.commit()
+            # get/create StudentRecord
+            student_record = StudentRecord.query.filter_by(student_id=self.studentID).first()
+
+            if not student_record:
+                # creates new student record if it doesn't exist
+                student_record = StudentRecord(student_id=self.studentID)
+                db.session.add(student_record)
+                db.session.flush()
+
+            # triggers the Observer pipeline , observers are attached globally
+            student_record.add_hours(
+                hours=self.hours,
+                description=self.description or f"Request #{self.requestID} approved",
+                logged_by=staff.username
+            )
         return self
 
     def deny(self, staff, reason=None):
@@ -98,14 +162,17 @@ class Request(db.Model):
         
         if self.status != 'pending':
             raise ValueError("Only pending requests can be denied")
+        if self.claimed_by_other(staff):
+            raise ValueError("Request is claimed by another reviewer")
         
-        self.status = 'denied'
-        self.staffID = staff.staff_id
-        
-        if reason:
-            self.description = f"{self.description or ''} [DENIED: {reason}]"
-        
-        db.session.commit()
+        with unit_of_work():
+            self.status = 'denied'
+            self.staffID = staff.staff_id
+            self.decided_at = datetime.utcnow()
+
+            if reason:
+                self.description = f"{self.description or ''} [DENIED: {reason}]"
+            self._flush_transition()
         return self
 
     def cancel(self, student):
@@ -118,6 +185,268 @@ class Request(db.Model):
         if self.status != 'pending':
             raise ValueError("Only pending requests can be canceled")
         
-        self.status = 'canceled'
-        db.session.commit()
+        with unit_of_work():
+            self.status = 'canceled'
+            self.decided_at = datetime.utcnow()
+            self._flush_transition()
         return self
+
+    def _flush_transition(self):
+        """
+        Write a status change as UPDATE ... WHERE requestID = ? AND version = ?
+        Raises RequestConflict if another worker changed the request first
+        """
+        request_id = self.requestID
+        try:
+            db.session.flush()
+        except StaleDataError:
+            raise RequestConflict(f"Request {request_id} was changed by someone else; reload and try again")
+
+    def claimed_by_other(self, staff, now=None):
+        """True if another staff member holds an unexpired lease on this request"""
+        now = now or datetime.utcnow()
+        return (
+            self.claimed_by is not None
+            and self.claimed_by != staff.staff_id
+            and self.claim_expires_at is not None
+            and self.claim_expires_at > now
+        )
+
+    @staticmethod
+    def claim(staff, limit=10, lease_seconds=None):
+        """
+        Lease the next `limit` unclaimed pending requests, oldest first, to a reviewer
+        One UPDATE whose subquery picks the rows with FOR UPDATE SKIP LOCKED, so
+        on Postgres concurrent reviewers skip each other's rows instead of
+        waiting; SQLite has no row locks and drops that clause, but runs the
+        single statement under its database write lock, which is equivalent.
+        Expired leases count as unclaimed.
+
+        Returns:
+            The claimed requests
+        """
+        from App.models.dataversion import DataVersion
+
+        lease_seconds = min(lease_seconds or Request.LEASE_SECONDS, Request.MAX_LEASE_SECONDS)
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=lease_seconds)
+        table = Request.__table__
+        available = (
+            select(table.c.requestID)
+            .where(
+                table.c.status == 'pending',
+                or_(table.c.claim_expires_at.is_(None), table.c.claim_expires_at <= now)
+            )
+            .order_by(table.c.timestamp, table.c.requestID)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        with unit_of_work():
+            db.session.execute(
+                table.update()
+                .where(table.c.requestID.in_(available.scalar_subquery()))
+                # Bump the version so a reviewer who loaded the row before this
+                # lease was taken gets a conflict instead of overriding it
+                .values(claimed_by=staff.staff_id, claim_expires_at=expires, version=table.c.version + 1),
+                execution_options={'synchronize_session': False}
+            )
+            DataVersion.touch(db.session, 'requests')
+            claimed = (
+                Request.query
+                .filter(Request.claimed_by == staff.staff_id, Request.claim_expires_at == expires)
+                .order_by(Request.timestamp, Request.requestID)
+                .populate_existing()
+                .all()
+            )
+        return claimed
+
+    @staticmethod
+    def release(staff, request_ids):
+        """
+        Give up a reviewer's leases on some requests
+        Returns the number released
+        """
+        from App.models.dataversion import DataVersion
+
+        table = Request.__table__
+        with unit_of_work():
+            result = db.session.execute(
+                table.update()
+                .where(table.c.requestID.in_(request_ids), table.c.claimed_by == staff.staff_id)
+                .values(claimed_by=None, claim_expires_at=None, version=table.c.version + 1),
+                execution_options={'synchronize_session': False}
+            )
+            DataVersion.touch(db.session, 'requests')
+        return result.rowcount
+
+    @staticmethod
+    def pending_page(cursor=None, limit=50, student_id=None, min_hours=None, max_hours=None,
+                     min_age_hours=None, max_age_hours=None):
+        """
+        One page of the pending queue, oldest first
+
+        Args:
+            cursor (str): next_cursor from the previous page, or None for the start
+            limit (int): Number of requests on the page
+            student_id (int): only this student's requests
+            min_hours, max_hours (float): only requests for this many hours (inclusive)
+            min_age_hours, max_age_hours (float): only requests submitted this long ago (inclusive)
+
+        Returns:
+            dict with the page's requests and the cursor for the next page (None at the end)
+
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        query = Request.query.filter(Request.status == 'pending')
+        if student_id is not None:
+            query = query.filter(Request.studentID == student_id)
+        if min_hours is not None:
+            query = query.filter(Request.hours >= min_hours)
+        if max_hours is not None:
+            query = query.filter(Request.hours <= max_hours)
+        now = datetime.utcnow()
+        if min_age_hours is not None:
+            query = query.filter(Request.timestamp <= now - timedelta(hours=min_age_hours))
+        if max_age_hours is not None:
+            query = query.filter(Request.timestamp >= now - timedelta(hours=max_age_hours))
+
+        after = Request.decode_cursor(cursor)
+        if after is not None:
+            timestamp, request_id = after
+            query = query.filter(or_(
+                Request.timestamp > timestamp,
+                and_(Request.timestamp == timestamp, Request.requestID > request_id)
+            ))
+
+        requests = query.order_by(Request.timestamp, Request.requestID).limit(limit).all()
+        next_cursor = None
+        if len(requests) == limit:
+            next_cursor = Request.encode_cursor(requests[-1].timestamp, requests[-1].requestID)
+        return {
+            'requests': requests,
+            'next_cursor': next_cursor
+        }
+
+    @staticmethod
+    def encode_cursor(timestamp, request_id):
+        """Opaque cursor for the queue key (timestamp, requestID)"""
+        raw = json.dumps([timestamp.isoformat(), request_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            timestamp, request_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(timestamp), int(request_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    # Batch actions, the status each leads to and the role allowed to take it
+    BATCH_ACTIONS = {
+        'approve': ('approved', 'staff'),
+        'deny': ('denied', 'staff'),
+        'cancel': ('canceled', 'student'),
+    }
+
+    @staticmethod
+    def apply_batch(user, approve=(), deny=(), cancel=(), reason=None):
+        """
+        Approve, deny and cancel many requests in one transaction
+        The requests are locked and updated together; approved hours are
+        added with one increment per student, their ActivityEntry rows are
+        inserted in one batch and observers are notified once per student
+
+        Args:
+            user: the Staff (approve/deny) or Student (cancel, own requests only)
+            approve, deny, cancel: request ids
+            reason (str): added to denied requests' descriptions
+
+        Returns:
+            List of per-item dicts with request_id, action, ok and status or error
+        """
+        from App.models.studentrecord import StudentRecord
+        from App.models.activityentry import ActivityEntry
+        from App.models.observerregistry import HOURS_ADDED
+
+        items = [(action, request_id) for action, ids in
+                 (('approve', approve), ('deny', deny), ('cancel', cancel)) for request_id in ids]
+        counts = {}
+        for _, request_id in items:
+            counts[request_id] = counts.get(request_id, 0) + 1
+
+        results = []
+        now = datetime.utcnow()
+        with unit_of_work():
+            requests = {
+                req.requestID: req for req in
+                Request.query.filter(Request.requestID.in_(list(counts))).with_for_update().all()
+            }
+            approved = []
+            for action, request_id in items:
+                status, role = Request.BATCH_ACTIONS[action]
+                req = requests.get(request_id)
+                error = None
+                if counts[request_id] > 1:
+                    error = 'Request listed more than once'
+                elif req is None:
+                    error = 'Request not found'
+                elif user.role != role:
+                    error = f'Only {role} can {action} requests'
+                elif action == 'cancel' and req.studentID != user.student_id:
+                    error = 'Students can only cancel their own requests'
+                elif req.status != 'pending':
+                    error = f'Only pending requests can be {status}'
+                elif role == 'staff' and req.claimed_by_other(user):
+                    error = 'Request is claimed by another reviewer'
+                if error:
+                    results.append({'request_id': request_id, 'action': action, 'ok': False, 'error': error})
+                    continue
+
+                req.status = status
+                req.decided_at = now
+                if role == 'staff':
+                    req.staffID = user.staff_id
+                if action == 'deny' and reason:
+                    req.description = f"{req.description or ''} [DENIED: {reason}]"
+                if action == 'approve':
+                    approved.append(req)
+                results.append({'request_id': request_id, 'action': action, 'ok': True, 'status': status})
+
+            # Every transition is checked against its loaded version before any hours move
+            try:
+                db.session.flush()
+            except StaleDataError:
+                raise RequestConflict("Some requests were changed by someone else; reload and try again")
+
+            if approved:
+                student_ids = {req.studentID for req in approved}
+                records = {
+                    record.student_id: record for record in
+                    StudentRecord.query.filter(StudentRecord.student_id.in_(student_ids)).all()
+                }
+                for student_id in student_ids - set(records):
+                    records[student_id] = StudentRecord(student_id=student_id)
+                    db.session.add(records[student_id])
+                db.session.flush()
+
+                hours = {}
+                for req in approved:
+                    hours[req.studentID] = hours.get(req.studentID, 0.0) + req.hours
+                db.session.add_all([
+                    ActivityEntry(
+                        student_record_id=records[req.studentID].id,
+                        hours=req.hours,
+                        description=req.description or f"Request #{req.requestID} approved",
+                        logged_by=user.username
+                    )
+                    for req in approved
+                ])
+                for student_id, total in hours.items():
+                    record = records[student_id]
+                    old_total, _ = record._increment_total(total)
+                    record.notify_observers(HOURS_ADDED, hours=total, old_total=old_total)
+        return results
+
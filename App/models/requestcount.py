@@ -0,0 +1,121 @@
+from App.database import db
+from sqlalchemy import event, func, select
+from sqlalchemy.orm.attributes import get_history
+from .request import Request
+from .archivedrequest import ArchivedRequest
+from .dataversion import DataVersion
+
+class RequestCount(db.Model):
+    """
+    RequestCount - Number of requests in each status, overall and per student
+    Adjusted on the flushing connection whenever a request is created, changes
+    status or is deleted, so the counts commit (or roll back) with the request
+    and reading them never scans the requests table. Archiving a request
+    does not change its count.
+    """
+    __tablename__ = "request_count"
+
+    # student_id of the rows counting every student's requests
+    ALL = 0
+    STATUSES = ('pending', 'approved', 'denied', 'canceled')
+
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __init__(self, student_id, status, count=0):
+        self.student_id = student_id
+        self.status = status
+        self.count = count
+
+    def get_json(self):
+        return {
+            'student_id': self.student_id,
+            'status': self.status,
+            'count': self.count
+        }
+
+    def __repr__(self):
+        return f"[RequestCount Student={self.student_id} Status={self.status} Count={self.count}]"
+
+    @staticmethod
+    def adjust(connection, changes):
+        """
+        Apply {(student_id, status): delta} to the student's and the overall counts
+        Runs on the given connection so it shares the caller's transaction
+        """
+        totals = {}
+        for (student_id, status), delta in changes.items():
+            for key in ((student_id, status), (RequestCount.ALL, status)):
+                totals[key] = totals.get(key, 0) + delta
+        table = RequestCount.__table__
+        # Sorted so concurrent transactions take the row locks in the same order
+        for (student_id, status), delta in sorted(totals.items()):
+            if delta == 0:
+                continue
+            result = connection.execute(
+                table.update()
+                .where(table.c.student_id == student_id, table.c.status == status)
+                .values(count=table.c.count + delta)
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(student_id=student_id, status=status, count=delta))
+
+    @staticmethod
+    def counts(student_id=None):
+        """{status: count} for one student, or for everyone when student_id is None"""
+        table = RequestCount.__table__
+        scope = RequestCount.ALL if student_id is None else student_id
+        counts = dict.fromkeys(RequestCount.STATUSES, 0)
+        counts.update(db.session.execute(
+            select(table.c.status, table.c.count).where(table.c.student_id == scope)
+        ).all())
+        return counts
+
+    @staticmethod
+    def rebuild():
+        """
+        Recount every student's requests from the live and archived tables
+        Used to backfill databases created before the table existed
+        """
+        table = RequestCount.__table__
+        counts = {}
+        # Archived requests still count
+        for model in (Request, ArchivedRequest):
+            for student_id, status, count in db.session.execute(
+                select(model.studentID, model.status, func.count())
+                .group_by(model.studentID, model.status)
+            ):
+                counts[(student_id, status)] = counts.get((student_id, status), 0) + count
+        db.session.execute(table.delete())
+        RequestCount.adjust(db.session.connection(), counts)
+        DataVersion.touch(db.session, 'requests')
+        db.session.commit()
+        return len(counts)
+
+
+@event.listens_for(Request, 'after_insert')
+def _request_inserted(mapper, connection, target):
+    RequestCount.adjust(connection, {(target.studentID, target.status): 1})
+
+@event.listens_for(Request, 'after_update')
+def _request_updated(mapper, connection, target):
+    status = get_history(target, 'status')
+    student = get_history(target, 'studentID')
+    if not (status.has_changes() or student.has_changes()):
+        return
+    old_status = status.deleted[0] if status.deleted else target.status
+    old_student = student.deleted[0] if student.deleted else target.studentID
+    changes = {(old_student, old_status): -1}
+    key = (target.studentID, target.status)
+    changes[key] = changes.get(key, 0) + 1
+    RequestCount.adjust(connection, changes)
+
+@event.listens_for(Request, 'after_delete')
+def _request_deleted(mapper, connection, target):
+    RequestCount.adjust(connection, {(target.studentID, target.status): -1})
+
+# Archived requests still count, until they are deleted
+@event.listens_for(ArchivedRequest, 'after_delete')
+def _archived_request_deleted(mapper, connection, target):
+    RequestCount.adjust(connection, {(target.studentID, target.status): -1})
@@ -1,4 +1,5 @@
-from App.database import db
+from datetime import datetime
+from App.database import db, unit_of_work
 from .user import User
 
 class Staff(User):
@@ -42,23 +43,23 @@ class Staff(User):
         from App.models import LoggedHours, StudentRecord
         if request.status != 'pending':
             return None
-        # Mark request as approved
-        request.status = 'approved'
-        # Create a LoggedHours entry
-        logged = LoggedHours(student_id=request.student_id, staff_id=self.staff_id, hours=request.hours, status='approved')
-        db.session.add(logged)
+        with unit_of_work():
+            # Mark request as approved
+            request.status = 'approved'
+            request.decided_at = datetime.utcnow()
+            # Create a LoggedHours entry
+            logged = LoggedHours(student_id=request.student_id, staff_id=self.staff_id, hours=request.hours, status='approved')
+            db.session.add(logged)
 
-        # Get or create StudentRecord and trigger Observer pattern
-        student_record = StudentRecord.query.filter_by(student_id=request.student_id).first()
-        if student_record:
-            # This will trigger the Observer pattern
-            student_record.add_hours(
-                hours=request.hours,
-                description=f"Request approved: {request.hours} hours",
-                logged_by=self.username
-            )
-
-        db.session.commit()
+            # Get or create StudentRecord and trigger Observer pattern
+            student_record = StudentRecord.query.filter_by(student_id=request.student_id).first()
+            if student_record:
+                # This will trigger the Observer pattern
+                student_record.add_hours(
+                    hours=request.hours,
+                    description=f"Request approved: {request.hours} hours",
+                    logged_by=self.username
+                )
         return logged
 
     #Method to deny a request
@@ -66,6 +67,7 @@ class Staff(User):
         if request.status != 'pending':
             return False
         request.status = 'denied'
+        request.decided_at = datetime.utcnow()
         db.session.commit()
         return True
 
@@ -5,6 +5,8 @@ class Student(User):
 
     __tablename__ = "student"
     student_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), primary_key=True)
+    cohort = db.Column(db.String(50), nullable=True)  # Class/cohort, e.g. "2025"
+    department = db.Column(db.String(100), nullable=True)  # Department the student volunteers with
 
     # Relationships
     student_record = db.relationship('StudentRecord', backref='student', uselist=False, lazy=True, cascade="all, delete-orphan")
@@ -16,8 +18,10 @@ class Student(User):
         "polymorphic_identity": "student"
     }
     #calls parent constructor
-    def __init__(self, username, email, password):
+    def __init__(self, username, email, password, cohort=None, department=None):
        super().__init__(username, email, password, role="student")
+       self.cohort = cohort
+       self.department = department
        # StudentRecord will be created automatically via initialization
 
     def __repr__(self):
@@ -27,12 +31,14 @@ class Student(User):
         return{
             'student_id': self.student_id,
             'username': self.username,
-            'email': self.email
+            'email': self.email,
+            'cohort': self.cohort,
+            'department': self.department
         }
 
     # Method to create a new student
-    def create_student(username, email, password):
-        newstudent = Student(username=username, email=email, password=password)
+    def create_student(username, email, password, cohort=None, department=None):
+        newstudent = Student(username=username, email=email, password=password, cohort=cohort, department=department)
         db.session.add(newstudent)
         db.session.commit()
         return newstudent
@@ -1,6 +1,8 @@
-from App.database import db
+from App.database import db, unit_of_work
 from datetime import datetime
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy import select
+from sqlalchemy.orm.attributes import set_committed_value
+from .observerregistry import HOURS_ADDED, get_observer_registry
 
 class StudentRecord(db.Model):
     """
@@ -35,34 +37,75 @@ class StudentRecord(db.Model):
         if observer in self._observers:
             self._observers.remove(observer)
 
-    def notify_observers(self):
-        """Notify all observers of state change"""
+    def notify_observers(self, event=HOURS_ADDED, **details):
+        """
+        Notify observers of state change
+        Observers attached to this instance get update() for hours_added; the
+        app's ObserverRegistry receives every event, including for records
+        loaded from the DB, either now or through the outbox
+        """
         # Handle case where _observers might not be initialized (when loaded from DB)
         if not hasattr(self, '_observers'):
             self._observers = []
-        for observer in self._observers:
-            observer.update(self)
+        if event == HOURS_ADDED:
+            for observer in self._observers:
+                observer.update(self)
+        registry = get_observer_registry()
+        if registry is not None:
+            registry.publish(event, self, **details)
 
     def add_hours(self, hours, description, logged_by):
         """
         Add hours to student record and notify observers
-        This is called when staff approves a request
+        This is called when staff approves a request; it commits only when
+        not already inside a unit_of_work
         """
-        old_total = self.total_hours
-        self.total_hours += hours
-
-        # Create activity entry
-        self.add_activity_entry(hours, description, logged_by)
+        with unit_of_work():
+            old_total, new_total = self._increment_total(hours)
 
-        # Check for new milestones
-        self._check_milestones(old_total, self.total_hours)
+            # Create activity entry
+            self.add_activity_entry(hours, description, logged_by)
 
-        # Notify observers (milestone and activity history observers)
-        self.notify_observers()
-
-        db.session.commit()
+            # Notify observers (milestones are awarded by MilestoneObserver)
+            self.notify_observers(HOURS_ADDED, hours=hours, old_total=old_total)
         return self
 
+    def _increment_total(self, hours):
+        """
+        Add to total_hours in the database rather than in Python
+        UPDATE ... SET total_hours = total_hours + :hours RETURNING total_hours,
+        so concurrent approvals from several workers never overwrite each
+        other. accolades is read back under the same row lock, so milestones
+        are awarded against what other workers already gave.
+        Returns the (old, new) totals as seen by this update.
+        """
+        # Any pending changes to the record go first
+        db.session.flush()
+        table = StudentRecord.__table__
+        stmt = (
+            table.update()
+            .where(table.c.id == self.id)
+            .values(total_hours=table.c.total_hours + hours)
+        )
+        connection = db.session.connection()
+        if connection.dialect.update_returning:
+            new_total, accolades = connection.execute(
+                stmt.returning(table.c.total_hours, table.c.accolades)
+            ).one()
+        else:
+            # The row stays locked by the UPDATE until commit, so this read is ours
+            connection.execute(stmt)
+            new_total, accolades = connection.execute(
+                select(table.c.total_hours, table.c.accolades).where(table.c.id == self.id)
+            ).one()
+
+        # The ORM did not make this change, so bring the instance and the leaderboard in line
+        set_committed_value(self, 'total_hours', new_total)
+        set_committed_value(self, 'accolades', list(accolades or []))
+        from .leaderboardentry import LeaderboardEntry
+        LeaderboardEntry.record_total(self, new_total)
+        return new_total - hours, new_total
+
     def add_activity_entry(self, hours, description, logged_by):
         """Add an activity entry to history"""
         from App.models.activityentry import ActivityEntry
@@ -75,27 +118,6 @@ class StudentRecord(db.Model):
         db.session.add(entry)
         return entry
 
-    def _check_milestones(self, old_total, new_total):
-        """Check and award new milestones"""
-        milestones = [
-            (10, '10 Hours Milestone'),
-            (25, '25 Hours Milestone'),
-            (50, '50 Hours Milestone')
-        ]
-
-        for threshold, milestone_name in milestones:
-            if new_total >= threshold and old_total < threshold:
-                if milestone_name not in self.accolades:
-                    self.accolades.append(milestone_name)
-                    # Mark the JSON field as modified so SQLAlchemy tracks the change
-                    flag_modified(self, 'accolades')
-                    # Add milestone achievement to activity history
-                    self.add_activity_entry(
-                        hours=0,
-                        description=f"Milestone achieved: {milestone_name}",
-                        logged_by="System"
-                    )
-
     def get_json(self):
         from App.models.activityentry import ActivityEntry
         activity_count = ActivityEntry.query.filter_by(student_record_id=self.id).count()
@@ -1,4 +1,5 @@
 from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import func
 from App.database import db
 
 class User(db.Model):
@@ -9,6 +10,13 @@ class User(db.Model):
     email = db.Column(db.String(256), nullable=False)
     role= db.Column(db.String(256),nullable=False, default="user")  #Create role column to distinguish user types
 
+    __table_args__ = (
+        # Lookups by email as stored (login)
+        db.Index('ix_users_email', 'email'),
+        # Case-insensitive lookups by email (imports)
+        db.Index('ix_users_email_lower', func.lower(email)),
+    )
+
     __mapper_args__ = {
         "polymorphic_on": role,
         "polymorphic_identity": "user"
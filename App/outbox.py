@@ -0,0 +1,128 @@
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from App.database import db, unit_of_work
+from App.models import OutboxEvent, StudentRecord
+from App.models.observerregistry import get_observer_registry
+
+# Defaults for the OUTBOX_* settings
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 60
+POLL_SECONDS = 2.0
+
+# app.extensions key holding the background worker's stop event
+WORKER_KEY = 'outbox_worker'
+
+
+def _setting(name, default):
+    return current_app.config.get(f'OUTBOX_{name}', default)
+
+def claim(batch_size=None):
+    """
+    Claim up to batch_size due events for this worker
+    Claimed events are leased (pushed out of reach) for OUTBOX_LEASE_SECONDS,
+    so other workers skip them and a crashed worker's events come back later
+    """
+    batch_size = batch_size or _setting('BATCH_SIZE', BATCH_SIZE)
+    now = datetime.utcnow()
+    with unit_of_work():
+        events = (
+            OutboxEvent.query
+            .filter(OutboxEvent.status == 'pending', OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        lease = now + timedelta(seconds=_setting('LEASE_SECONDS', LEASE_SECONDS))
+        for event in events:
+            event.attempts += 1
+            event.available_at = lease
+    return [event.id for event in events]
+
+def deliver(event_id):
+    """
+    Dispatch one claimed event to the registry's observers in its own transaction
+    Returns True if it was delivered; failures are retried with backoff until
+    OUTBOX_MAX_ATTEMPTS, then marked failed. Events that no longer exist are skipped
+    """
+    registry = get_observer_registry()
+    try:
+        with unit_of_work():
+            event = db.session.get(OutboxEvent, event_id)
+            if event is None:
+                # Deleted since it was claimed (e.g. with its student record)
+                return False
+            # Events are claimed one by one, so another drain may be delivering
+            # for the same record; lock it so their accolades don't overwrite each other
+            record = (
+                StudentRecord.query
+                .filter_by(id=event.student_record_id)
+                .with_for_update()
+                .populate_existing()
+                .first()
+            )
+            if record is not None:
+                registry.dispatch(event.event, record, **event.payload)
+            event.status = 'done'
+            event.processed_at = datetime.utcnow()
+        return True
+    except Exception as e:
+        current_app.logger.warning(f"Outbox event {event_id} failed: {e}")
+        with unit_of_work():
+            event = db.session.get(OutboxEvent, event_id)
+            if event is None:
+                return False
+            event.last_error = str(e)[:500]
+            if event.attempts >= _setting('MAX_ATTEMPTS', MAX_ATTEMPTS):
+                event.status = 'failed'
+            else:
+                event.available_at = datetime.utcnow() + timedelta(seconds=2 ** event.attempts)
+        return False
+
+def drain(batch_size=None):
+    """
+    Deliver due events until none are left
+    Returns (delivered, failed) counts
+    """
+    delivered = failed = 0
+    while True:
+        event_ids = claim(batch_size)
+        if not event_ids:
+            return delivered, failed
+        for event_id in event_ids:
+            if deliver(event_id):
+                delivered += 1
+            else:
+                failed += 1
+
+def run_worker(app, stop, poll_seconds=None, batch_size=None):
+    """Drain the outbox every poll interval until stop is set"""
+    poll_seconds = poll_seconds or app.config.get('OUTBOX_POLL_SECONDS', POLL_SECONDS)
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                drain(batch_size)
+            except Exception as e:
+                app.logger.warning(f"Outbox worker error: {e}")
+            finally:
+                db.session.remove()
+        stop.wait(poll_seconds)
+
+def start_worker(app):
+    """
+    Run the outbox worker on a daemon thread in this process and queue
+    observer events for it from now on
+    Returns its stop event, or None when OUTBOX_MODE is set to 'inline'
+    """
+    if app.config.get('OUTBOX_MODE') == 'inline':
+        return None
+    if WORKER_KEY in app.extensions:
+        return app.extensions[WORKER_KEY]
+    with app.app_context():
+        get_observer_registry().mode = 'outbox'
+    stop = threading.Event()
+    threading.Thread(target=run_worker, args=(app, stop), daemon=True).start()
+    app.extensions[WORKER_KEY] = stop
+    return stop
@@ -2,6 +2,15 @@ import pytest
 from App import create_app
 from App.database import db
 
+@pytest.fixture(scope="session", autouse=True)
+def shared_cache_path(tmp_path_factory):
+    """Keep every test app's shared cache file out of instance/"""
+    path = tmp_path_factory.mktemp("cache") / "shared-cache.db"
+    with pytest.MonkeyPatch.context() as mp:
+        # Read by load_config through app.config.from_prefixed_env()
+        mp.setenv('FLASK_SHARED_CACHE_PATH', str(path))
+        yield path
+
 @pytest.fixture(scope="function")
 def test_app():
     """Create Flask app for testing"""
@@ -0,0 +1,63 @@
+import pytest
+from App.models import Student, Staff, Request, StudentRecord
+from App.database import db
+
+
+def test_students_listing_returns_304_until_changed(test_app, test_client):
+    """Unchanged polls of /api/students get 304; a new student changes the ETag"""
+
+    with test_app.app_context():
+        Student.create_student("etag_a", "etag_a@example.com", "pass")
+
+        first = test_client.get("/api/students")
+        etag = first.headers['ETag']
+        assert first.status_code == 200
+        assert len(first.get_json()) == 1
+
+        again = test_client.get("/api/students", headers={'If-None-Match': etag})
+        assert again.status_code == 304
+        assert again.data == b''
+
+        # Changes to other data leave the students ETag alone
+        Staff.create_staff("etag_staff", "etag_staff@example.com", "pass")
+        assert test_client.get("/api/students", headers={'If-None-Match': etag}).status_code == 304
+
+        Student.create_student("etag_b", "etag_b@example.com", "pass")
+        changed = test_client.get("/api/students", headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert len(changed.get_json()) == 2
+
+
+def test_leaderboard_etag_moves_with_hours(test_app, test_client):
+    """Approving hours invalidates the leaderboard ETag"""
+
+    with test_app.app_context():
+        student = Student.create_student("etag_lb", "etag_lb@example.com", "pass")
+        staff = Staff.create_staff("etag_lb_staff", "etag_lb_staff@example.com", "pass")
+
+        etag = test_client.get("/api/leaderboard").headers['ETag']
+        assert test_client.get("/api/leaderboard", headers={'If-None-Match': etag}).status_code == 304
+
+        request = Request(studentID=student.student_id, hours=4.0)
+        request.submit()
+        request.accept(staff)
+
+        response = test_client.get("/api/leaderboard", headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+
+def test_pending_age_filters_are_not_cached(test_app, test_client):
+    """Age-filtered pending queues depend on the clock, so they carry no ETag"""
+
+    with test_app.app_context():
+        Staff.create_staff("etag_pq_staff", "etag_pq_staff@example.com", "pass")
+        token = test_client.post("/api/login", json={"username": "etag_pq_staff", "password": "pass"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert 'ETag' in test_client.get("/api/requests/pending", headers=headers).headers
+        for url in ("/api/requests/pending?min_age_hours=1", "/api/pending_requests?max_age_hours=24"):
+            response = test_client.get(url, headers=headers)
+            assert response.status_code == 200
+            assert 'ETag' not in response.headers
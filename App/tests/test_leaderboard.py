@@ -1,7 +1,11 @@
 import pytest 
-from App.models import Student, StudentRecord, Leaderboard 
+from App.models import Student, StudentRecord, Leaderboard, LeaderboardEntry, RankIndex, RankingEngine, LoggedHours
+from App.models import ActivityEntry, ActivityBucket, DataVersion
+from App.cache import SharedCache, get_cache
+from datetime import date, datetime, timedelta
 from App.database import db 
 from App.models import Request, Staff 
+from App.models.leaderboardentry import SEGMENT_INDEX_KEY
 
 def test_leaderboard_ranking_accuracy(test_app): 
     """Test that leaderboard rankings are accurate via total hours in descending order""" 
@@ -145,3 +149,498 @@ def test_full_integration_leaderboard(test_app):
         ranking = Leaderboard.get_student_rank(student.student_id) 
         assert ranking['total_hours'] == 5.0 
         assert ranking['rank'] == 1
+
+
+def test_leaderboard_entry_tracks_add_hours(test_app):
+    """Test that the persisted leaderboard row follows StudentRecord.add_hours()"""
+
+    with test_app.app_context():
+        student1 = Student(username="EntryA", email="EntryA@example.com", password="pass123")
+        student2 = Student(username="EntryB", email="EntryB@example.com", password="pass123")
+        db.session.add_all([student1, student2])
+        db.session.commit()
+
+        # Students without a record are ranked with 0 hours
+        entry = db.session.get(LeaderboardEntry, student2.student_id)
+        assert entry is not None
+        assert entry.total_hours == 0.0
+
+        record = StudentRecord(student_id=student2.student_id)
+        db.session.add(record)
+        db.session.commit()
+        record.add_hours(12.0, "Entry test", "Staff")
+
+        db.session.expire_all()
+        assert db.session.get(LeaderboardEntry, student2.student_id).total_hours == 12.0
+
+        top = Leaderboard.get_top_students(limit=1)
+        assert top[0]['student_id'] == student2.student_id
+        assert Leaderboard.get_student_rank(student1.student_id)['rank'] == 2
+        assert Leaderboard.get_total_students() == 2
+
+
+def test_leaderboard_entry_rebuild(test_app):
+    """Test that rebuild() backfills rows from existing student records"""
+
+    with test_app.app_context():
+        student = Student(username="Rebuild", email="Rebuild@example.com", password="pass123")
+        db.session.add(student)
+        db.session.commit()
+        record = StudentRecord(student_id=student.student_id)
+        record.total_hours = 7.5
+        db.session.add(record)
+        db.session.commit()
+
+        db.session.query(LeaderboardEntry).delete()
+        db.session.commit()
+
+        assert LeaderboardEntry.rebuild() == 1
+        assert Leaderboard.get_student_rank(student.student_id)['total_hours'] == 7.5
+
+
+def test_leaderboard_snapshot_reused_until_hours_change(test_app):
+    """Test that one snapshot serves every read until a total changes"""
+
+    with test_app.app_context():
+        student = Student(username="Snap", email="Snap@example.com", password="pass123")
+        db.session.add(student)
+        db.session.commit()
+        record = StudentRecord(student_id=student.student_id)
+        db.session.add(record)
+        db.session.commit()
+
+        snapshot = Leaderboard.snapshot()
+        assert Leaderboard.snapshot() is snapshot
+        assert snapshot.total == 1
+        assert snapshot.rank_of(student.student_id)['total_hours'] == 0.0
+
+        record.add_hours(4.0, "Snapshot test", "Staff")
+
+        refreshed = Leaderboard.snapshot()
+        assert refreshed is not snapshot
+        assert refreshed.top(1)[0]['total_hours'] == 4.0
+        assert Leaderboard.get_json() == refreshed.get_json()
+
+
+
+def test_rank_index_order_statistics():
+    """Test RankIndex position, competition rank and rank-k lookups"""
+
+    index = RankIndex([(1, 10.0), (2, 30.0), (3, 10.0), (4, 5.0)])
+
+    assert [index.at(k) for k in range(1, 5)] == [2, 1, 3, 4]
+    assert index.position(3) == 3
+    assert index.rank(3) == 2  # tied with student 1
+    assert index.at(5) is None
+
+    index.update(4, 40.0)
+    assert index.at(1) == 4
+    assert index.position(2) == 2
+    assert index.slice(1, 2) == [4, 2]
+
+    index.remove(1)
+    assert len(index) == 3
+    assert index.position(1) is None
+
+
+def test_rank_index_follows_committed_hours(test_app):
+    """Test that the shared RankIndex picks up committed add_hours() changes only"""
+
+    with test_app.app_context():
+        students = [Student(username=f"idx{i}", email=f"idx{i}@example.com", password="pass123") for i in range(3)]
+        db.session.add_all(students)
+        db.session.commit()
+        records = [StudentRecord(student_id=s.student_id) for s in students]
+        db.session.add_all(records)
+        db.session.commit()
+
+        index = Leaderboard.index()
+        assert len(index) == 3
+
+        records[2].add_hours(8.0, "Index test", "Staff")
+        assert Leaderboard.index() is index
+        assert Leaderboard.get_student_at(1)['student_id'] == students[2].student_id
+        assert Leaderboard.get_student_rank(students[2].student_id)['rank'] == 1
+
+        # Uncommitted totals never reach the index
+        records[0].total_hours = 100.0
+        db.session.flush()
+        db.session.rollback()
+        assert index.position(students[0].student_id) == 2
+
+
+def test_ranking_engine_tie_ranks(test_app):
+    """Test that the ranking engine gives tied students the same competition and dense rank"""
+
+    with test_app.app_context():
+        students = [Student(username=f"rank{i}", email=f"rank{i}@example.com", password="pass123") for i in range(4)]
+        db.session.add_all(students)
+        db.session.commit()
+        for student, hours in zip(students, [20.0, 30.0, 20.0, 5.0]):
+            record = StudentRecord(student_id=student.student_id)
+            record.total_hours = hours
+            db.session.add(record)
+        db.session.commit()
+
+        rankings = RankingEngine.rankings('lifetime')
+        assert [r['username'] for r in rankings] == ["rank1", "rank0", "rank2", "rank3"]
+        assert [r['rank'] for r in rankings] == [1, 2, 2, 4]
+        assert [r['dense_rank'] for r in rankings] == [1, 2, 2, 3]
+
+        # The RankIndex agrees with the database on tied ranks
+        tied = Leaderboard.get_student_rank(students[2].student_id)
+        assert tied['rank'] == 2
+        assert tied['dense_rank'] == 2
+        assert Leaderboard.get_student_rank(students[3].student_id)['dense_rank'] == 3
+
+
+def test_ranking_engine_approved_source(test_app):
+    """Test that the approved source sums approved LoggedHours in the database"""
+
+    with test_app.app_context():
+        a = Student(username="sumA", email="sumA@example.com", password="pass123")
+        b = Student(username="sumB", email="sumB@example.com", password="pass123")
+        db.session.add_all([a, b])
+        db.session.commit()
+        db.session.add_all([
+            LoggedHours(student_id=a.student_id, staff_id=None, hours=2.0, status='approved'),
+            LoggedHours(student_id=a.student_id, staff_id=None, hours=9.0, status='denied'),
+            LoggedHours(student_id=b.student_id, staff_id=None, hours=3.0, status='approved'),
+            LoggedHours(student_id=b.student_id, staff_id=None, hours=1.5, status='approved'),
+        ])
+        db.session.commit()
+
+        rankings = RankingEngine.rankings('approved')
+        assert [(r['username'], r['total_hours'], r['rank']) for r in rankings] == [
+            ("sumB", 4.5, 1),
+            ("sumA", 2.0, 2),
+        ]
+        with pytest.raises(ValueError):
+            RankingEngine.rankings('unknown')
+
+
+def test_windowed_leaderboard_uses_daily_buckets(test_app):
+    """Test that activity is bucketed per day and windowed rankings only count recent days"""
+
+    with test_app.app_context():
+        old_timer = Student(username="oldtimer", email="oldtimer@example.com", password="pass123")
+        newcomer = Student(username="newcomer", email="newcomer@example.com", password="pass123")
+        db.session.add_all([old_timer, newcomer])
+        db.session.commit()
+        old_record = StudentRecord(student_id=old_timer.student_id)
+        new_record = StudentRecord(student_id=newcomer.student_id)
+        db.session.add_all([old_record, new_record])
+        db.session.commit()
+
+        # Lots of hours two months ago, a little this week
+        long_ago = datetime.utcnow() - timedelta(days=60)
+        db.session.add(ActivityEntry(old_record.id, 40.0, "Old work", "Staff", date=long_ago))
+        db.session.add(ActivityEntry(old_record.id, 1.0, "Recent work", "Staff"))
+        new_record.add_hours(3.0, "Recent work", "Staff")
+        new_record.add_hours(2.0, "More recent work", "Staff")
+        db.session.commit()
+
+        today = ActivityBucket.query.filter_by(student_record_id=new_record.id, day=datetime.utcnow().date()).one()
+        assert today.hours == 5.0
+        assert today.entry_count == 2
+
+        month = RankingEngine.rankings('month')
+        assert [(r['username'], r['total_hours']) for r in month] == [("newcomer", 5.0), ("oldtimer", 1.0)]
+
+        # Rebuilding from history gives the same buckets
+        assert ActivityBucket.rebuild() == 3
+        assert RankingEngine.rankings('week') == RankingEngine.rankings('month')
+
+
+def test_term_window_start():
+    """Test the default term boundaries"""
+
+    assert RankingEngine.window_start('term', today=date(2026, 10, 18)) == date(2026, 9, 1)
+    assert RankingEngine.window_start('term', today=date(2026, 3, 2)) == date(2026, 1, 1)
+    assert RankingEngine.window_start('week', today=date(2026, 10, 18)) == date(2026, 10, 12)
+
+
+def test_data_version_bumped_once_at_commit(test_app):
+    """Test that flushes only mark a version, which is bumped once when the transaction commits"""
+
+    with test_app.app_context():
+        before = DataVersion.current('leaderboard')
+        student = Student(username="flushed", email="flushed@example.com", password="pass123")
+        db.session.add(student)
+        db.session.flush()
+        student.cohort = "2025"
+        db.session.flush()
+        # The counter row is left alone until the commit
+        assert DataVersion.current('leaderboard') == before
+        db.session.commit()
+        assert DataVersion.current('leaderboard') == (before[0], before[1] + 1)
+
+
+def test_leaderboard_version_bumped_by_approval(test_app):
+    """Test that approving a request moves the leaderboard version and refreshes the shared cache"""
+
+    with test_app.app_context():
+        student = Student(username="versioned", email="versioned@example.com", password="pass123")
+        staff = Staff(username="versioner", email="versioner@example.com", password="pass123")
+        db.session.add_all([student, staff])
+        db.session.commit()
+
+        cache = get_cache()
+        before = cache.stats()['names'].get('leaderboard:lifetime', {'hits': 0, 'misses': 0})
+
+        assert Leaderboard.recalculate_rankings()[0]['total_hours'] == 0.0
+        assert Leaderboard.recalculate_rankings()[0]['total_hours'] == 0.0
+        version = DataVersion.current('leaderboard')
+
+        request = Request(studentID=student.student_id, hours=6.0)
+        request.submit()
+        request.accept(staff)
+
+        assert DataVersion.current('leaderboard')[1] > version[1]
+        assert Leaderboard.recalculate_rankings()[0]['total_hours'] == 6.0
+
+        after = cache.stats()['names']['leaderboard:lifetime']
+        assert after['hits'] - before['hits'] == 1
+        assert after['misses'] - before['misses'] == 2
+
+
+def test_shared_cache_between_instances(tmp_path):
+    """Test that two cache handles on one file (as in two workers) see each other's entries"""
+
+    path = str(tmp_path / "cache.db")
+    worker1 = SharedCache(path)
+    worker2 = SharedCache(path)
+
+    assert worker1.get("board", "v1") is None
+    worker1.set("board", "v1", [{"rank": 1}])
+    assert worker2.get("board", "v1") == [{"rank": 1}]
+    assert worker2.get("board", "v2") is None
+
+    # Each worker's counts reach the shared counters when it flushes
+    worker2.flush_stats()
+    assert worker1.stats()['names']['board'] == {'hits': 1, 'misses': 2}
+
+
+def test_shared_cache_locked_file_is_a_miss(tmp_path, monkeypatch):
+    """Test that a locked cache file degrades to misses instead of raising"""
+    import sqlite3
+
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    cache.set("board", "v1", [{"rank": 1}])
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "_connect", locked)
+    assert cache.get("board", "v1") is None
+    assert cache.set("board", "v2", []) == []
+    cache.flush_stats()
+
+    # The miss is kept until the file can be written again
+    monkeypatch.undo()
+    assert cache.get("board", "v1") == [{"rank": 1}]
+    assert cache.stats()['names']['board'] == {'hits': 1, 'misses': 1}
+
+
+def test_rank_index_catches_up_after_other_worker_commit(test_app, monkeypatch):
+    """Test that the RankIndex reads only changed rows when another worker moved the version"""
+
+    with test_app.app_context():
+        students = [Student(username=f"w{i}", email=f"w{i}@example.com", password="pass123") for i in range(3)]
+        db.session.add_all(students)
+        db.session.commit()
+
+        index = Leaderboard.index()
+        assert Leaderboard.index() is index
+
+        # Another worker writes a total straight to the table and bumps the version
+        table = LeaderboardEntry.__table__
+        with db.engine.begin() as connection:
+            connection.execute(
+                table.update().where(table.c.student_id == students[1].student_id)
+                .values(total_hours=3.0, updated_at=datetime.utcnow())
+            )
+            DataVersion.bump(connection, 'leaderboard')
+
+        # Caught up in place, without reloading the whole board
+        loaded = []
+        original = RankIndex.__init__
+        monkeypatch.setattr(RankIndex, '__init__', lambda self, entries=(): loaded.append(1) or original(self, entries))
+        assert Leaderboard.index() is index
+        assert index.at(1) == students[1].student_id
+        assert loaded == []
+
+        # A deleted row is noticed by the count and the index is rebuilt
+        with db.engine.begin() as connection:
+            connection.execute(table.delete().where(table.c.student_id == students[2].student_id))
+            DataVersion.bump(connection, 'leaderboard')
+        reloaded = Leaderboard.index()
+        assert reloaded is not index
+        assert students[2].student_id not in reloaded
+        assert len(reloaded) == 2
+
+
+def test_leaderboard_cursor_pages_and_around_me(test_app, test_client):
+    """Test cursor pagination walks the board once and around_me returns neighbours"""
+
+    with test_app.app_context():
+        students = []
+        for i in range(7):
+            student = Student(username=f"page{i}", email=f"page{i}@example.com", password="pass123")
+            db.session.add(student)
+            db.session.commit()
+            record = StudentRecord(student_id=student.student_id)
+            record.total_hours = float(i % 3)
+            db.session.add(record)
+            students.append(student)
+        db.session.commit()
+
+        test_client.post("/api/login", json={"username": "page0", "password": "pass123"})
+
+        seen = []
+        cursor = None
+        while True:
+            url = "/api/leaderboard/page?limit=3" + (f"&cursor={cursor}" if cursor else "")
+            data = test_client.get(url).get_json()
+            seen.extend(entry['username'] for entry in data['leaderboard'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        expected = [r['username'] for r in Leaderboard.recalculate_rankings()]
+        assert seen == expected
+
+        around = test_client.get("/api/leaderboard/around_me?k=1").get_json()
+        positions = [entry['position'] for entry in around['leaderboard']]
+        me = around['current_user_rank']
+        assert me['username'] == "page0"
+        assert positions == [4, 5, 6]
+        assert me['rank'] == 5  # tied on 0 hours with page3 and page6
+
+        assert test_client.get("/api/leaderboard/page?cursor=garbage").status_code == 400
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    """Test that concurrent callers of one key share a single execution"""
+    import threading, time
+    from App.cache import SingleFlight
+
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "rankings"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("board@1", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["rankings"] * 5
+    assert not flight.in_flight("board@1")
+
+
+def test_leaderboard_stale_while_revalidate(test_app):
+    """Test that stale rankings are served while a background refresh computes new ones"""
+    import time
+
+    with test_app.app_context():
+        test_app.config['LEADERBOARD_STALE_WHILE_REVALIDATE'] = True
+        student = Student(username="swr", email="swr@example.com", password="pass123")
+        db.session.add(student)
+        db.session.commit()
+        record = StudentRecord(student_id=student.student_id)
+        db.session.add(record)
+        db.session.commit()
+
+        assert Leaderboard.rankings()[0]['total_hours'] == 0.0
+
+        record.add_hours(5.0, "SWR test", "Staff")
+
+        # First read after the change still gets the previous rankings
+        assert Leaderboard.rankings()[0]['total_hours'] == 0.0
+
+        version = DataVersion.token('leaderboard')
+        for _ in range(50):
+            cached = get_cache().peek('leaderboard:lifetime')
+            if cached[0] == version:
+                break
+            time.sleep(0.05)
+        assert cached[0] == version
+        assert Leaderboard.rankings()[0]['total_hours'] == 5.0
+
+
+def test_segment_leaderboard_ranks_within_segment(test_app, test_client):
+    """Test that cohort leaderboards rank only their members and follow moves and new hours"""
+
+    with test_app.app_context():
+        cohorts = ["2024", "2025", "2025", "2025"]
+        students = []
+        for i, cohort in enumerate(cohorts):
+            student = Student(username=f"seg{i}", email=f"seg{i}@example.com", password="pass123", cohort=cohort)
+            db.session.add(student)
+            db.session.commit()
+            record = StudentRecord(student_id=student.student_id)
+            record.total_hours = float(10 - i)
+            db.session.add(record)
+            db.session.commit()
+            students.append(student)
+
+        assert LeaderboardEntry.query.get(students[1].student_id).cohort == "2025"
+
+        index = Leaderboard.segment_index('cohort', "2025")
+        assert len(index) == 3
+        assert Leaderboard.get_segment_rank(students[1].student_id, 'cohort', "2025")['rank'] == 1
+        assert Leaderboard.get_segment_rank(students[0].student_id, 'cohort', "2025") is None
+
+        # Committed hours and cohort moves are applied to the loaded index in place
+        students[3].student_record.add_hours(5.0, "Tutoring", "Staff")
+        db.session.commit()
+        students[1].cohort = "2024"
+        db.session.commit()
+        assert Leaderboard.segment_index('cohort', "2025") is index
+        assert [index.at(1), index.at(2)] == [students[3].student_id, students[2].student_id]
+        assert len(Leaderboard.segment_index('cohort', "2024")) == 2
+
+        with pytest.raises(ValueError):
+            Leaderboard.segment_index('username', "seg0")
+
+        # Values from the URL that match nobody are not kept, and the rest are bounded
+        assert len(Leaderboard.segment_index('cohort', "junk")) == 0
+        assert ('cohort', "junk") not in test_app.extensions[SEGMENT_INDEX_KEY]
+        test_app.config['LEADERBOARD_SEGMENT_INDEX_LIMIT'] = 1
+        test_app.extensions.pop(SEGMENT_INDEX_KEY)
+        Leaderboard.segment_index('cohort', "2025")
+        Leaderboard.segment_index('cohort', "2024")
+        assert list(test_app.extensions[SEGMENT_INDEX_KEY]) == [('cohort', "2024")]
+        test_app.config.pop('LEADERBOARD_SEGMENT_INDEX_LIMIT')
+
+        test_client.post("/api/login", json={"username": "seg2", "password": "pass123"})
+        data = test_client.get("/api/leaderboard/cohort/2025").get_json()
+        assert [entry['username'] for entry in data['leaderboard']] == ["seg3", "seg2"]
+        assert data['current_user_rank']['rank'] == 2
+        assert test_client.get("/api/leaderboard/username/seg0").status_code == 400
+
+
+def test_top_students_do_not_rank_everyone(test_app, monkeypatch):
+    """Test that top-N is served from the RankIndex without computing the full ranking"""
+
+    with test_app.app_context():
+        for i, hours in enumerate([3.0, 9.0, 6.0]):
+            student = Student(username=f"Top{i}", email=f"top{i}@example.com", password="pass123")
+            db.session.add(student)
+            db.session.commit()
+            record = StudentRecord(student_id=student.student_id)
+            record.total_hours = hours
+            db.session.add(record)
+            db.session.commit()
+
+        monkeypatch.setattr(RankingEngine, 'rankings', lambda *a, **k: pytest.fail("full ranking computed"))
+        top = Leaderboard.get_top_students(limit=2)
+        assert [entry['username'] for entry in top] == ["Top1", "Top2"]
+        assert [entry['rank'] for entry in top] == [1, 2]
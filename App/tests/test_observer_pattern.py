@@ -174,4 +174,99 @@ def test_integration_both_observers():
     assert "Community service" in activity_descriptions or any("Community service" in entry.description for entry in activity_entries)
 
     # Verify total hours updated correctly
-    assert record.total_hours == 25.0
\ No newline at end of file
+    assert record.total_hours == 25.0
+def test_registry_notifies_loaded_records():
+    """Test that records loaded from the DB reach the app's observers through the registry"""
+    from App.models.observerregistry import get_observer_registry
+    record = StudentRecord(student_id=7)
+    db.session.add(record)
+    db.session.commit()
+    record_id = record.id
+    db.session.expunge_all()
+
+    loaded = db.session.get(StudentRecord, record_id)
+    assert not getattr(loaded, '_observers', [])
+    loaded.add_hours(10, "Loaded record", "Staff1")
+
+    # MilestoneObserver only runs through the registry for a loaded record
+    assert '10 Hours Milestone' in loaded.accolades
+    timings = get_observer_registry().timings()
+    assert timings['MilestoneObserver']['hours_added']['calls'] >= 1
+    assert timings['ActivityHistoryObserver']['milestone_reached']['calls'] >= 1
+
+def test_registry_dispatch_order_and_events():
+    """Test that the registry calls observers by priority with typed event details"""
+    from App.models import Observer, ObserverRegistry, HOURS_ADDED, MILESTONE_REACHED
+
+    calls = []
+
+    class Recorder(Observer):
+        events = (HOURS_ADDED, MILESTONE_REACHED)
+
+        def __init__(self, name):
+            self.name = name
+
+        def update(self, record):
+            pass
+
+        def on_event(self, event, record, **details):
+            calls.append((self.name, event, details))
+
+    registry = ObserverRegistry()
+    registry.subscribe(Recorder("late"), priority=50)
+    registry.subscribe(Recorder("early"), priority=5)
+    registry.subscribe(Recorder("milestones"), events=[MILESTONE_REACHED])
+
+    registry.dispatch(HOURS_ADDED, None, hours=3)
+    registry.dispatch(MILESTONE_REACHED, None, milestone="Bronze")
+
+    assert calls == [
+        ("early", HOURS_ADDED, {'hours': 3}),
+        ("late", HOURS_ADDED, {'hours': 3}),
+        ("early", MILESTONE_REACHED, {'milestone': "Bronze"}),
+        ("late", MILESTONE_REACHED, {'milestone': "Bronze"}),
+        ("milestones", MILESTONE_REACHED, {'milestone': "Bronze"}),
+    ]
+    assert registry.timings()['Recorder'][HOURS_ADDED]['calls'] == 2
+
+    with pytest.raises(ValueError):
+        registry.subscribe(Recorder("bad"), events=["hours_removed"])
+
+def test_milestone_table_crossing():
+    """Test that every threshold crossed in one update is found, not just exact landings"""
+    from App.models import MilestoneTable
+    table = MilestoneTable([(25, "Silver"), (10, "Bronze"), (50, "Gold")])
+
+    assert table.crossed(0, 9.5) == []
+    assert table.crossed(8, 30) == [(10.0, "Bronze"), (25.0, "Silver")]
+    assert table.crossed(10, 12) == []
+    assert table.earned(50) == [(10.0, "Bronze"), (25.0, "Silver"), (50.0, "Gold")]
+
+    record = StudentRecord(student_id=8)
+    db.session.add(record)
+    db.session.commit()
+    record.attach(MilestoneObserver())
+    record.add_hours(30, "Big jump", "Staff")
+    assert '10 Hours Milestone' in record.accolades
+    assert '25 Hours Milestone' in record.accolades
+
+def test_milestone_reevaluation_awards_new_thresholds():
+    """Test that re-evaluating with a changed table awards milestones already passed"""
+    from App.models import MilestoneTable
+    record = StudentRecord(student_id=9)
+    db.session.add(record)
+    db.session.commit()
+    record.add_hours(7, "Below every default milestone", "Staff")
+    assert record.accolades == []
+
+    table = MilestoneTable([(5, "5 Hours Milestone")] + list(MilestoneTable.DEFAULT))
+    counts = table.reevaluate_all(chunk_size=2)
+    assert counts['updated'] >= 1
+    assert counts['scanned'] == StudentRecord.query.count()
+    db.session.expire_all()
+    assert db.session.get(StudentRecord, record.id).accolades == ["5 Hours Milestone"]
+    descriptions = [entry.description for entry in db.session.get(StudentRecord, record.id).activity_history]
+    assert descriptions.count("Milestone achieved: 5 Hours Milestone") == 1
+    assert table.reevaluate_all(chunk_size=2)['updated'] == 0
+    # Chunks with nothing to award still end their transaction, releasing their row locks
+    assert not db.session().in_transaction()
@@ -0,0 +1,95 @@
+import pytest
+from App import create_app
+from App import outbox
+from App.database import db
+from App.models import Student, StudentRecord, OutboxEvent, Observer, HOURS_ADDED
+from App.models.observerregistry import get_observer_registry
+
+@pytest.fixture(scope="function")
+def outbox_app():
+    """App whose observers run through the outbox instead of inline"""
+    app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'OUTBOX_MODE': 'outbox',
+        })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _loaded_record(username):
+    student = Student(username=username, email=f"{username}@example.com", password="pass123")
+    db.session.add(student)
+    db.session.commit()
+    record = StudentRecord(student_id=student.student_id)
+    db.session.add(record)
+    db.session.commit()
+    record_id = record.id
+    db.session.expunge_all()
+    return db.session.get(StudentRecord, record_id)
+
+
+def test_add_hours_queues_events_in_same_transaction(outbox_app):
+    """Test that observer events are written with the hours and delivered by the worker"""
+    record = _loaded_record("outbox1")
+    record.add_hours(10, "Queued", "Staff")
+
+    # The observers have not run yet, but the events were committed with the hours
+    assert '10 Hours Milestone' not in record.accolades
+    events = OutboxEvent.query.all()
+    assert [e.event for e in events] == ['hours_added']
+    assert events[0].payload == {'hours': 10, 'old_total': 0.0}
+
+    # Delivering hours_added awards the milestone, which queues milestone_reached
+    assert outbox.drain() == (2, 0)
+    db.session.expire_all()
+    assert '10 Hours Milestone' in db.session.get(StudentRecord, record.id).accolades
+    assert OutboxEvent.query.filter_by(status='done').count() == 2
+    assert outbox.drain() == (0, 0)
+
+
+def test_failed_delivery_is_retried_then_marked_failed(outbox_app):
+    """Test that a failing observer leaves the event for a retry, up to the attempt limit"""
+
+    class Broken(Observer):
+        def update(self, record):
+            raise RuntimeError("mail server down")
+
+    outbox_app.config['OUTBOX_MAX_ATTEMPTS'] = 2
+    get_observer_registry().subscribe(Broken(), events=[HOURS_ADDED])
+
+    record = _loaded_record("outbox2")
+    record.add_hours(1, "Retry", "Staff")
+
+    assert outbox.drain() == (0, 1)
+    event = OutboxEvent.query.filter_by(event='hours_added').one()
+    assert event.status == 'pending'
+    assert event.attempts == 1
+    assert "mail server down" in event.last_error
+
+    # Not due again until the backoff passes
+    assert outbox.claim() == []
+    event.available_at = event.created_at
+    db.session.commit()
+
+    assert outbox.drain() == (0, 1)
+    assert OutboxEvent.query.filter_by(event='hours_added').one().status == 'failed'
+
+
+def test_worker_switches_registry_to_outbox(test_app):
+    """Test that events are only queued once a worker is running to drain them"""
+    registry = get_observer_registry()
+    assert registry.mode == 'inline'
+    stop = outbox.start_worker(test_app)
+    try:
+        assert registry.mode == 'outbox'
+        assert outbox.start_worker(test_app) is stop
+    finally:
+        stop.set()
+
+
+def test_deliver_skips_deleted_event(outbox_app):
+    """Test that an event deleted after it was claimed is skipped instead of crashing"""
+    assert outbox.deliver(12345) is False
@@ -1,6 +1,6 @@
 import os
 import pytest
-from App.models import Request, Student, Staff, StudentRecord, LoggedHours, ActivityEntry
+from App.models import Request, Student, Staff, StudentRecord, LoggedHours, ActivityEntry, LeaderboardEntry
 from App.database import db
 from datetime import datetime
 
@@ -183,4 +183,231 @@ def test_denied_does_not_update_hours(test_app, setup_users):
     updated_record = StudentRecord.query.filter_by(student_id=student.student_id).first()
     assert updated_record is not None, "StudentRecord disappeared after deny/commit"
     assert updated_record.total_hours == initial_hours
-    assert updated_record.total_hours == 0
\ No newline at end of file
+    assert updated_record.total_hours == 0
+#Test Approval Commits Once
+def test_accept_commits_once(test_app, setup_users):
+  from sqlalchemy import event
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    req = Request(student_id=student.student_id, hours=10, description="Milestone run")
+    req.submit()
+
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(db.session(), "after_commit", listener)
+    try:
+      req.accept(staff)
+    finally:
+      event.remove(db.session(), "after_commit", listener)
+
+    assert len(commits) == 1
+    record = StudentRecord.query.filter_by(student_id=student.student_id).first()
+    assert record.total_hours == 10
+    assert '10 Hours Milestone' in record.accolades
+
+#Test Failed Approval Rolls Back Everything
+def test_failed_unit_of_work_rolls_back(test_app, setup_users):
+  from App.database import unit_of_work
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    record = StudentRecord.query.filter_by(student_id=student.student_id).first()
+    before = record.total_hours
+
+    with pytest.raises(RuntimeError):
+      with unit_of_work():
+        record.add_hours(4, "Never committed", "Staff")
+        raise RuntimeError("approval failed")
+
+    db.session.expire_all()
+    assert StudentRecord.query.filter_by(student_id=student.student_id).first().total_hours == before
+    assert ActivityEntry.query.filter_by(description="Never committed").count() == 0
+
+#Test Concurrent Approvals Do Not Lose Hours
+def test_add_hours_increments_in_database(test_app, setup_users):
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    record = StudentRecord.query.filter_by(student_id=student.student_id).first()
+    before = record.total_hours
+
+    # Another worker adds hours after this instance was loaded
+    table = StudentRecord.__table__
+    db.session.execute(table.update().where(table.c.id == record.id).values(total_hours=table.c.total_hours + 5))
+
+    record.add_hours(6, "Concurrent approval", "Staff")
+
+    assert record.total_hours == before + 11
+    db.session.expire_all()
+    assert StudentRecord.query.filter_by(student_id=student.student_id).first().total_hours == before + 11
+    # Milestones see the totals the database saw, so the 10 hour threshold was crossed
+    assert '10 Hours Milestone' in record.accolades
+
+    assert db.session.get(LeaderboardEntry, student.student_id).total_hours == before + 11
+
+#Test Concurrent Approvals Do Not Lose Accolades
+def test_add_hours_keeps_accolades_awarded_elsewhere(test_app, setup_users):
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    record = StudentRecord.query.filter_by(student_id=student.student_id).first()
+    assert record.accolades == []
+
+    # Another worker approves 12 hours and awards the 10 hour milestone after this instance was loaded
+    table = StudentRecord.__table__
+    db.session.execute(
+      table.update().where(table.c.id == record.id)
+      .values(total_hours=table.c.total_hours + 12, accolades=['10 Hours Milestone'])
+    )
+
+    record.add_hours(15, "Concurrent approval", "Staff")
+
+    db.session.expire_all()
+    record = StudentRecord.query.filter_by(student_id=student.student_id).first()
+    assert record.total_hours == 27
+    assert record.accolades == ['10 Hours Milestone', '25 Hours Milestone']
+
+#Test Concurrent Transition Is Rejected
+def test_stale_accept_raises_conflict(test_app, setup_users):
+  from App.models import RequestConflict
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    req = Request(student_id=student.student_id, hours=4)
+    req.submit()
+    assert req.version == 1
+    record = StudentRecord.query.filter_by(student_id=student.student_id).first()
+    before = record.total_hours
+
+    # Another worker approves the same request after this instance was loaded
+    from sqlalchemy.orm.attributes import set_committed_value
+    table = Request.__table__
+    db.session.execute(
+      table.update().where(table.c.requestID == req.requestID).values(status='approved', version=table.c.version + 1)
+    )
+    db.session.commit()
+    set_committed_value(req, 'status', 'pending')
+    set_committed_value(req, 'version', 1)
+
+    with pytest.raises(RequestConflict):
+      req.accept(staff)
+
+    db.session.expire_all()
+    assert StudentRecord.query.filter_by(student_id=student.student_id).first().total_hours == before
+    assert db.session.get(Request, req.requestID).version == 2
+
+#Test A Claim Taken After Loading Blocks The Stale Reviewer
+def test_claim_after_load_raises_conflict(test_app, setup_users):
+  from App.models import RequestConflict
+  from sqlalchemy.orm.attributes import set_committed_value
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    other = Staff(username='otherstaff', email='otherstaff@test.com', password='password')
+    db.session.add(other)
+    db.session.commit()
+    req = Request(student_id=student.student_id, hours=4)
+    req.submit()
+
+    # Another reviewer leases the request after this instance was loaded
+    Request.claim(other, limit=1)
+    set_committed_value(req, 'claimed_by', None)
+    set_committed_value(req, 'claim_expires_at', None)
+    set_committed_value(req, 'version', 1)
+
+    with pytest.raises(RequestConflict):
+      req.accept(staff)
+
+    db.session.expire_all()
+    assert db.session.get(Request, req.requestID).status == 'pending'
+
+#Test Status Counters Follow Every Transition
+def test_status_counts_follow_transitions(test_app, setup_users):
+  from App.models import RequestCount
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    other = Student(username='otherstudent', email='other@test.com', password='password')
+    db.session.add(other)
+    db.session.commit()
+
+    reqs = [Request(student_id=student.student_id, hours=1) for _ in range(4)]
+    for req in reqs:
+      req.submit()
+    Request(student_id=other.student_id, hours=2).submit()
+
+    reqs[0].accept(staff)
+    reqs[1].deny(staff, "No proof")
+    reqs[2].cancel(student)
+    with pytest.raises(ValueError):
+      reqs[2].cancel(student)
+
+    assert RequestCount.counts(student.student_id) == {'pending': 1, 'approved': 1, 'denied': 1, 'canceled': 1}
+    assert RequestCount.counts(other.student_id) == {'pending': 1, 'approved': 0, 'denied': 0, 'canceled': 0}
+    assert RequestCount.counts() == {'pending': 2, 'approved': 1, 'denied': 1, 'canceled': 1}
+
+    # The counters agree with a full recount
+    before = RequestCount.counts()
+    RequestCount.rebuild()
+    assert RequestCount.counts() == before
+
+#Test Old Closed Requests Move To The Archive
+def test_archive_closed_requests(test_app, setup_users):
+  from datetime import timedelta
+  from App import archive
+  from App.models import ArchivedRequest, RequestCount
+  from App.controllers.student_controller import fetch_requests
+  student, staff, _ = setup_users
+  with test_app.app_context():
+    reqs = [Request(student_id=student.student_id, hours=1) for _ in range(5)]
+    for req in reqs:
+      req.submit()
+    reqs[0].accept(staff)
+    reqs[1].deny(staff, "No proof")
+    reqs[2].cancel(student)
+    reqs[4].accept(staff)
+    old = datetime.utcnow() - timedelta(days=90)
+    for req in reqs:
+      req.timestamp = old
+    for req in reqs[:3]:
+      req.decided_at = old
+    db.session.commit()
+    ids = [req.requestID for req in reqs]
+    expected = {i: db.session.get(Request, i).get_json() for i in ids}
+    counts = RequestCount.counts(student.student_id)
+
+    # Pending requests stay live however old they are, and so do
+    # old requests that were only decided recently
+    assert archive.archive_closed(after_days=30, batch_size=2) == 3
+    db.session.expire_all()
+    assert [req.requestID for req in Request.query.all()] == [ids[3], ids[4]]
+    reqs[4].decided_at = old
+    db.session.commit()
+    expected[ids[4]] = reqs[4].get_json()
+    assert archive.archive_closed(after_days=30, batch_size=2) == 1
+    db.session.expire_all()
+    assert [req.requestID for req in Request.query.all()] == [ids[3]]
+    assert ArchivedRequest.query.count() == 4
+
+    # Archived requests read back exactly as they did before
+    for i in ids:
+      assert Request.find(i).get_json() == expected[i]
+    assert [req.requestID for req in fetch_requests(student.student_id)] == ids
+    assert RequestCount.counts(student.student_id) == counts
+
+    # The newest id was archived, but is never handed out again
+    new = Request(student_id=student.student_id, hours=2)
+    new.submit()
+    assert new.requestID > max(ids)
+    assert archive.archive_closed(after_days=30) == 0
+
+#Test Hot Queries Are Planned On Their Indexes
+def test_hot_queries_use_indexes(test_app):
+  from App import explain
+  with test_app.app_context():
+    results = explain.report()
+    assert results
+    for result in results:
+      assert result['uses_index'], result
+
+#Test EXPLAIN Reports Missing Tables Instead Of Failing
+def test_explain_reports_missing_tables(test_app):
+  from App import explain
+  with test_app.app_context():
+    ActivityEntry.__table__.drop(db.engine)
+    with pytest.raises(ValueError, match="activity_entry"):
+      explain.report()
@@ -1,4 +1,4 @@
-import pytest, json
+import pytest, json, io
 from App.main import create_app
 from App.database import db
 from App.models import Student, Staff, Request, StudentRecord, ActivityEntry
@@ -138,3 +138,233 @@ def test_no_duplicate_accolades(app, client, users):
   assert acc.count("10 Hours Milestone") == 1
 
 
+
+
+# test 5
+def test_batch_approve_deny_cancel(app, client, users):
+
+# One batch call approves and denies; hours are grouped per student, bad items reported
+
+  student, staff, _ = users
+
+  login(client, "student", "student123")
+  ids = [client.post("/api/requests", json={"hours": h, "description": f"Batch {h}"}).get_json()["request"]["requestID"]
+         for h in (4, 7, 2, 1)]
+
+  login(client, "staff", "staff123")
+  r = client.post("/api/requests/batch", json={"approve": ids[:2], "deny": [ids[2], 9999], "cancel": [ids[3]], "reason": "dup"})
+  data = r.get_json()
+
+  assert r.status_code == 200
+  assert data["processed"] == 3 and data["failed"] == 2
+  results = {(item["action"], item["request_id"]): item for item in data["results"]}
+  assert results[("deny", 9999)]["error"] == "Request not found"
+  assert results[("cancel", ids[3])]["error"] == "Only student can cancel requests"
+
+  # Two approvals for the same student add 11 hours at once and cross the 10 hour milestone
+  login(client, "student", "student123")
+  hist = client.get("/api/activity_history").get_json()
+  assert hist["total_hours"] == 11
+  assert {"Batch 4", "Batch 7", "Milestone achieved: 10 Hours Milestone"} <= {a["description"] for a in hist["activities"]}
+  assert "10 Hours Milestone" in client.get("/api/accolades").get_json()
+
+  # The student can cancel their own pending request in a batch, but not approve
+  r = client.post("/api/requests/batch", json={"cancel": [ids[3]], "approve": [ids[0]]})
+  results = r.get_json()["results"]
+  assert results[0]["ok"] is False and results[1] == {"request_id": ids[3], "action": "cancel", "ok": True, "status": "canceled"}
+
+  assert client.post("/api/requests/batch", json={"approve": "all"}).status_code == 400
+
+
+# test 6
+def test_pending_queue_pages_and_filters(app, client, users):
+
+# The pending queue is read oldest first in pages, and can be filtered
+
+  from datetime import datetime, timedelta
+  student, staff, _ = users
+
+  now = datetime.utcnow()
+  reqs = [Request(studentID=student.student_id, hours=h) for h in (1, 2, 3, 4, 5)]
+  db.session.add_all(reqs)
+  for age, req in zip((50, 40, 40, 3, 1), reqs):
+    req.timestamp = now - timedelta(hours=age)
+  db.session.commit()
+  expected = [req.requestID for req in reqs]
+
+  login(client, "staff", "staff123")
+  seen, cursor = [], None
+  while True:
+    url = "/api/pending_requests?limit=2" + (f"&cursor={cursor}" if cursor else "")
+    data = client.get(url).get_json()
+    seen.extend(r["requestID"] for r in data["requests"])
+    cursor = data["next_cursor"]
+    if cursor is None:
+      break
+  assert seen == expected
+
+  data = client.get("/api/requests/pending?min_hours=2&max_hours=4&min_age_hours=24").get_json()
+  assert [r["hours"] for r in data["requests"]] == [2, 3]
+  data = client.get("/api/requests/pending?max_age_hours=12").get_json()
+  assert [r["hours"] for r in data["requests"]] == [4, 5]
+
+  assert client.get("/api/pending_requests?cursor=nope").status_code == 400
+  assert client.get("/api/pending_requests?min_hours=lots").status_code == 400
+
+
+# test 7
+def test_reviewers_claim_disjoint_requests(app, client, users):
+
+# Two reviewers claiming at once get different requests, and leases block others until released
+
+  student, staff, _ = users
+  other = Staff(username="staff2", email="staff2@test.com", password="staff123")
+  db.session.add(other)
+  reqs = [Request(studentID=student.student_id, hours=1) for _ in range(5)]
+  db.session.add_all(reqs)
+  db.session.commit()
+
+  login(client, "staff", "staff123")
+  mine = [r["requestID"] for r in client.post("/api/requests/claim", json={"limit": 3}).get_json()["requests"]]
+  login(client, "staff2", "staff123")
+  theirs = [r["requestID"] for r in client.post("/api/requests/claim", json={"limit": 3}).get_json()["requests"]]
+
+  assert len(mine) == 3 and len(theirs) == 2
+  assert not set(mine) & set(theirs)
+
+  # staff2 cannot review a request leased to staff until it is released
+  r = client.put(f"/api/requests/{mine[0]}/approve")
+  assert r.status_code == 400 and "claimed" in r.get_json()["message"]
+
+  login(client, "staff", "staff123")
+  assert client.post("/api/requests/release", json={"request_ids": [mine[0]]}).get_json()["released"] == 1
+  login(client, "staff2", "staff123")
+  assert client.put(f"/api/requests/{mine[0]}/approve").status_code == 200
+
+  # Expired leases are handed out again
+  db.session.expire_all()
+  held = db.session.get(Request, theirs[0])
+  held.claim_expires_at = held.timestamp
+  db.session.commit()
+  login(client, "staff", "staff123")
+  assert [r["requestID"] for r in client.post("/api/requests/claim", json={"limit": 5}).get_json()["requests"]] == [theirs[0]]
+
+
+# test 8
+def test_import_requests_file(app, client, users):
+
+# Staff upload a CSV: good rows become pending requests, bad rows are reported by line
+
+  student, staff, _ = users
+  rows = (
+      "student_id,email,hours,description\n"
+      f"{student.student_id},,3,Beach cleanup\n"
+      ",STUDENT@test.com,2.5,\n"
+      "9999,,1,Nobody\n"
+      f"{student.student_id},,-1,Negative\n"
+      f"{student.student_id},,4,Food bank\n"
+  )
+
+  login(client, "student", "student123")
+  r = client.post("/api/requests/import", data={"file": (io.BytesIO(rows.encode()), "hours.csv")})
+  assert r.status_code == 403
+
+  login(client, "staff", "staff123")
+  app.config['IMPORT_CHUNK_SIZE'] = 2
+  r = client.post("/api/requests/import", data={"file": (io.BytesIO(rows.encode()), "hours.csv")})
+  assert r.status_code == 200
+  body = r.get_json()
+  assert body["imported"] == 3 and body["failed"] == 2
+  assert body["errors"] == [
+      {"line": 4, "error": "Student not found"},
+      {"line": 5, "error": "Hours must be greater than 0"},
+  ]
+  pending = Request.query.filter_by(studentID=student.student_id, status="pending").order_by(Request.requestID).all()
+  assert [req.hours for req in pending] == [3, 2.5, 4]
+
+  # Imported rows go through the normal workflow
+  assert client.put(f"/api/requests/{pending[0].requestID}/approve").status_code == 200
+
+  # JSON Lines sent as the raw body; emails match whatever case they were stored in
+  db.session.add(Student(username="mixed", email="Mixed@Test.com", password="mixed123"))
+  db.session.commit()
+  lines = (
+      json.dumps({"student_id": student.student_id, "hours": 1}) + "\nnot json\n"
+      + json.dumps({"email": "mixed@test.com", "hours": 2}) + "\n"
+  )
+  r = client.post("/api/requests/import", data=lines, content_type="application/x-ndjson")
+  assert r.get_json() == {"imported": 2, "failed": 1, "errors": [{"line": 2, "error": "Invalid JSON"}]}
+
+  # Imported rows are counted with the rest
+  counts = client.get("/api/requests/counts").get_json()
+  assert counts["counts"] == {"pending": 4, "approved": 1, "denied": 0, "canceled": 0}
+  login(client, "student", "student123")
+  assert client.get("/api/requests/counts").get_json()["student_id"] == student.student_id
+
+
+# test 9
+def test_idempotency_key_replays_response(app, client, users):
+
+# Retried writes with the same Idempotency-Key get the first response back without repeating the write
+
+  student, staff, _ = users
+  login(client, "student", "student123")
+  headers = {"Idempotency-Key": "submit-1"}
+
+  first = client.post("/api/requests", json={"hours": 5}, headers=headers)
+  retry = client.post("/api/requests", json={"hours": 5}, headers=headers)
+  assert first.status_code == retry.status_code == 201
+  assert retry.get_json() == first.get_json()
+  assert retry.headers["Idempotent-Replayed"] == "true"
+  assert Request.query.filter_by(studentID=student.student_id).count() == 1
+
+  # The same key cannot be reused for a different request
+  r = client.post("/api/requests", json={"hours": 6}, headers=headers)
+  assert r.status_code == 422
+
+  # A retried approval is answered from the store instead of failing on the second pass
+  request_id = first.get_json()["request"]["requestID"]
+  login(client, "staff", "staff123")
+  approve = {"Idempotency-Key": "approve-1"}
+  assert client.put(f"/api/requests/{request_id}/approve", headers=approve).status_code == 200
+  r = client.put(f"/api/requests/{request_id}/approve", headers=approve)
+  assert r.status_code == 200 and r.headers["Idempotent-Replayed"] == "true"
+  assert client.put(f"/api/requests/{request_id}/approve").status_code == 400
+  assert StudentRecord.query.filter_by(student_id=student.student_id).first().total_hours == 5
+
+  # Expired keys run the request again
+  app.config['IDEMPOTENCY_TTL_SECONDS'] = 0
+  login(client, "student", "student123")
+  assert client.post("/api/requests", json={"hours": 2}, headers={"Idempotency-Key": "submit-2"}).status_code == 201
+  r = client.post("/api/requests", json={"hours": 2}, headers={"Idempotency-Key": "submit-2"})
+  assert r.status_code == 201 and "Idempotent-Replayed" not in r.headers
+
+
+# test 10
+def test_archived_request_routes(app, client, users):
+
+# Archived ids are still found: closed-request errors instead of 404, and staff can delete them
+
+  from App import archive
+  from App.models import ArchivedRequest, RequestCount
+  student, _, _ = users
+  staff = Staff.query.filter_by(username="staff").first()
+  req = Request(studentID=student.student_id, hours=2)
+  req.submit()
+  req.accept(staff)
+  request_id = req.requestID
+  assert archive.archive_closed(after_days=0) == 1
+
+  login(client, "staff", "staff123")
+  r = client.put(f"/api/requests/{request_id}/approve")
+  assert r.status_code == 400 and r.get_json()["message"] == "Only pending requests can be approved"
+  r = client.put("/api/deny_request", json={"request_id": request_id})
+  assert r.status_code == 400 and r.get_json()["message"] == "Only pending requests can be denied"
+
+  assert RequestCount.counts(student.student_id)["approved"] == 1
+  assert client.delete("/api/delete_request", json={"request_id": request_id}).status_code == 200
+  assert ArchivedRequest.query.count() == 0
+  assert RequestCount.counts(student.student_id)["approved"] == 0
+
+  login(client, "student", "student123")
+  assert client.put(f"/api/requests/{request_id}/cancel").status_code == 404
@@ -0,0 +1,49 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response
+from flask_jwt_extended import get_jwt_identity
+from App.models import DataVersion
+from App.cache import served_stale
+
+
+def conditional(*names, per_user=False, daily=False, uncached_args=()):
+    """
+    Conditional GET for a view whose output depends only on the named DataVersions
+    The ETag is derived from those versions (plus the URL, and the caller or the
+    date when the output varies by them), so an unchanged poll is answered with
+    304 before the view runs any queries or encodes any JSON.
+
+    Requests with any of uncached_args in the query string depend on the
+    clock as well, so they are answered in full without an ETag.
+
+    Put it below @jwt_required() when per_user is set.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if any(arg in request.args for arg in uncached_args):
+                return view(*args, **kwargs)
+            # Versions are read before the view runs, so the body can only be
+            # newer than its tag and a stale 304 is never sent
+            parts = [DataVersion.token(name) for name in names]
+            parts.append(request.full_path)
+            if per_user:
+                parts.append(str(get_jwt_identity()))
+            if daily:
+                parts.append(datetime.utcnow().date().isoformat())
+            etag = hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                # A stale body must not carry the current tag, or the client
+                # would keep revalidating against data it never received
+                if response.status_code != 200 or served_stale():
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,66 @@
+import hashlib
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from App.database import db
+from App.models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+# Defaults for the IDEMPOTENCY_* settings
+TTL_SECONDS = 24 * 60 * 60
+LOCK_SECONDS = 60
+
+
+def idempotent(view):
+    """
+    Replay the stored response when a write is retried with the same Idempotency-Key
+    Keys are per caller. The first attempt's response is kept for
+    IDEMPOTENCY_TTL_SECONDS; a retry gets it back (with Idempotent-Replayed:
+    true) without the view running. Reusing a key for a different request is
+    a 422, and retrying while the first attempt is still running is a 409.
+    Server errors are not stored, so they can be retried.
+
+    Put it below @jwt_required().
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify(message=f'{HEADER} must be at most 255 characters'), 400
+
+        fingerprint = hashlib.sha256(
+            b"|".join([request.method.encode(), request.path.encode(), request.get_data()])
+        ).hexdigest()
+        row, reserved = IdempotencyKey.reserve(
+            str(get_jwt_identity()), key, fingerprint,
+            current_app.config.get('IDEMPOTENCY_TTL_SECONDS', TTL_SECONDS),
+            current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', LOCK_SECONDS)
+        )
+        if row is None or (not reserved and not row.completed):
+            return jsonify(message='A request with this Idempotency-Key is still in progress'), 409
+        if row.fingerprint != fingerprint:
+            return jsonify(message=f'{HEADER} was already used for a different request'), 422
+        if not reserved:
+            response = make_response(row.body, row.status_code)
+            response.content_type = row.content_type
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        row_id = row.id
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.release(row_id)
+            raise
+        if response.status_code >= 500:
+            db.session.rollback()
+            IdempotencyKey.release(row_id)
+        else:
+            IdempotencyKey.complete(row_id, response.status_code, response.content_type,
+                                    response.get_data(as_text=True))
+        return response
+    return wrapper
@@ -1,5 +1,7 @@
 from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify
 from App.controllers import initialize
+from App.cache import get_cache
+from App.models.observerregistry import get_observer_registry
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -14,4 +16,12 @@ def init():
 
 @index_views.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status':'healthy'})
\ No newline at end of file
+    return jsonify({'status':'healthy'})
+
+@index_views.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_cache().stats())
+
+@index_views.route('/api/observer_stats', methods=['GET'])
+def observer_stats():
+    return jsonify(get_observer_registry().timings())
@@ -1,13 +1,21 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
-from App.models import Request, Student, Staff
+from App.models import Request, RequestConflict, RequestCount, Student, Staff
 from App.database import db
+from App import importer
+from .conditional import conditional
+from .idempotency import idempotent
+from App.controllers.staff_controller import fetch_pending_page, AGE_FILTERS
 
 request_views = Blueprint('request_views', __name__, template_folder='../templates')
 
+# Most request ids accepted by one /api/requests/batch call
+MAX_BATCH_SIZE = 500
+
 # POST /requests - Student submits a request 
 @request_views.route('/api/requests', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_request():
     
     """Student creates a new hours request"""
@@ -48,9 +56,14 @@ def create_request():
 # GET /requests/pending - Staff views pending request
 @request_views.route('/api/requests/pending', methods=['GET'])
 @jwt_required()
+@conditional('requests', per_user=True, uncached_args=AGE_FILTERS)
 def get_pending_requests():
     
-    """Staff retrieves all pending requests"""
+    """
+    Staff retrieves pending requests, oldest first
+    Paged with ?cursor=&limit= and filtered by student_id, min_hours,
+    max_hours, min_age_hours and max_age_hours
+    """
     
     user = jwt_current_user
 
@@ -58,20 +71,186 @@ def get_pending_requests():
         return jsonify(message='Access forbidden: Not a staff member'), 403
 
     try:
-        pending_requests = Request.query.filter_by(status='pending').all()
-
-        return jsonify({
-            'count': len(pending_requests),
-            'requests': [req.get_json() for req in pending_requests]
-        }), 200
+        return jsonify(fetch_pending_page(request.args)), 200
 
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
     except Exception as e:
         return jsonify(message=f'Error fetching requests: {str(e)}'), 500
 
 
+# GET /requests/counts - Number of requests in each status
+@request_views.route('/api/requests/counts', methods=['GET'])
+@jwt_required()
+@conditional('requests', per_user=True)
+def get_request_counts():
+
+    """
+    Requests per status, read from the maintained counters
+    Staff see everyone's counts, or one student's with ?student_id=;
+    students see their own
+    """
+
+    user = jwt_current_user
+
+    if user.role == 'staff':
+        student_id = request.args.get('student_id', type=int)
+    elif user.role == 'student':
+        student_id = user.student_id
+    else:
+        return jsonify(message='Access forbidden: Not a staff member or student'), 403
+
+    counts = RequestCount.counts(student_id)
+    return jsonify({
+        'student_id': student_id,
+        'counts': counts,
+        'total': sum(counts.values())
+    }), 200
+
+
+# POST /requests/batch - Staff approve/deny, or a student cancels, many requests at once
+@request_views.route('/api/requests/batch', methods=['POST'])
+@jwt_required()
+@idempotent
+def batch_requests():
+    
+    """
+    Apply approve/deny/cancel lists of request ids in one transaction
+    Staff may approve and deny; students may cancel their own requests.
+    Items that cannot be applied are reported without failing the rest.
+    """
+    
+    user = jwt_current_user
+
+    if user.role not in ('staff', 'student'):
+        return jsonify(message='Access forbidden: Not a staff member or student'), 403
+
+    data = request.json or {}
+    lists = {action: data.get(action, []) for action in Request.BATCH_ACTIONS}
+
+    for action, ids in lists.items():
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify(message=f'{action} must be a list of request ids'), 400
+
+    total = sum(len(ids) for ids in lists.values())
+    if total == 0:
+        return jsonify(message='Nothing to do: provide approve, deny or cancel lists'), 400
+    if total > MAX_BATCH_SIZE:
+        return jsonify(message=f'At most {MAX_BATCH_SIZE} requests per batch'), 400
+
+    try:
+        results = Request.apply_batch(user, reason=data.get('reason'), **lists)
+    except RequestConflict as e:
+        return jsonify(message=str(e)), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(message=f'Error processing batch: {str(e)}'), 500
+
+    return jsonify({
+        'processed': sum(1 for r in results if r['ok']),
+        'failed': sum(1 for r in results if not r['ok']),
+        'results': results
+    }), 200
+
+
+# POST /requests/claim - Staff lease the next pending requests to review
+@request_views.route('/api/requests/claim', methods=['POST'])
+@jwt_required()
+def claim_requests():
+    
+    """
+    Lease up to `limit` unclaimed pending requests to the caller, oldest first
+    Other reviewers cannot approve or deny them until the lease expires or is released
+    """
+    
+    user = jwt_current_user
+
+    if user.role != 'staff':
+        return jsonify(message='Access forbidden: Not a staff member'), 403
+
+    data = request.json or {}
+    limit = data.get('limit', 10)
+    lease_seconds = data.get('lease_seconds')
+
+    if not isinstance(limit, int) or limit <= 0 or limit > 50:
+        return jsonify(message='limit must be between 1 and 50'), 400
+    if lease_seconds is not None and (not isinstance(lease_seconds, int) or lease_seconds <= 0):
+        return jsonify(message='lease_seconds must be a positive number of seconds'), 400
+
+    try:
+        claimed = Request.claim(user, limit, lease_seconds)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(message=f'Error claiming requests: {str(e)}'), 500
+
+    return jsonify({
+        'count': len(claimed),
+        'requests': [req.get_json() for req in claimed]
+    }), 200
+
+
+# POST /requests/release - Staff give back requests they claimed
+@request_views.route('/api/requests/release', methods=['POST'])
+@jwt_required()
+def release_requests():
+    
+    """Release the caller's leases on the listed requests"""
+    
+    user = jwt_current_user
+
+    if user.role != 'staff':
+        return jsonify(message='Access forbidden: Not a staff member'), 403
+
+    data = request.json or {}
+    request_ids = data.get('request_ids')
+    if not isinstance(request_ids, list) or not all(isinstance(i, int) for i in request_ids):
+        return jsonify(message='request_ids must be a list of request ids'), 400
+
+    released = Request.release(user, request_ids)
+    return jsonify({'released': released}), 200
+
+
+# POST /requests/import - Staff upload a CSV/JSONL file of requests
+@request_views.route('/api/requests/import', methods=['POST'])
+@jwt_required()
+def import_requests_file():
+
+    """
+    Create pending requests from an uploaded file, streamed row by row
+    Send it as the multipart field `file`, or as the raw body with a
+    text/csv or application/x-ndjson content type; ?format= overrides
+    the detected format. Bad rows are reported by line without stopping the import.
+    """
+
+    user = jwt_current_user
+
+    if user.role != 'staff':
+        return jsonify(message='Access forbidden: Not a staff member'), 403
+
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        fmt = request.args.get('format') or importer.detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        fmt = request.args.get('format') or importer.detect_format(None, request.mimetype)
+
+    if fmt not in importer.FORMATS:
+        return jsonify(message='Upload a .csv or .jsonl file, or pass ?format=csv|jsonl'), 400
+
+    try:
+        result = importer.import_requests(stream, fmt)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(message=f'Error importing requests: {str(e)}'), 500
+
+    return jsonify(result), 200
+
+
 # PUT /requests/<id>/approve - Staff approves request
 @request_views.route('/api/requests/<int:id>/approve', methods=['PUT'])
 @jwt_required()
+@idempotent
 def approve_request(id):
     
     """
@@ -83,7 +262,7 @@ def approve_request(id):
     if user.role != 'staff':
         return jsonify(message='Access forbidden: Not a staff member'), 403
 
-    req = Request.query.get(id)
+    req = Request.find(id)
     if not req:
         return jsonify(message='Request not found'), 404
 
@@ -99,6 +278,8 @@ def approve_request(id):
             'request': req.get_json()
         }), 200
 
+    except RequestConflict as e:
+        return jsonify(message=str(e)), 409
     except ValueError as e:
         return jsonify(message=str(e)), 400
     except Exception as e:
@@ -109,6 +290,7 @@ def approve_request(id):
 # PUT /requests/<id>/deny - Staff denies request
 @request_views.route('/api/requests/<int:id>/deny', methods=['PUT'])
 @jwt_required()
+@idempotent
 def deny_request(id):
     
     """Staff denies a request"""
@@ -118,7 +300,7 @@ def deny_request(id):
     if user.role != 'staff':
         return jsonify(message='Access forbidden: Not a staff member'), 403
 
-    req = Request.query.get(id)
+    req = Request.find(id)
     if not req:
         return jsonify(message='Request not found'), 404
 
@@ -137,6 +319,8 @@ def deny_request(id):
             'request': req.get_json()
         }), 200
 
+    except RequestConflict as e:
+        return jsonify(message=str(e)), 409
     except ValueError as e:
         return jsonify(message=str(e)), 400
     except Exception as e:
@@ -156,7 +340,7 @@ def cancel_request(id):
     if user.role != 'student':
         return jsonify(message='Access forbidden: Not a student'), 403
 
-    req = Request.query.get(id)
+    req = Request.find(id)
     if not req:
         return jsonify(message='Request not found'), 404
 
@@ -174,6 +358,8 @@ def cancel_request(id):
 
     except PermissionError as e:
         return jsonify(message=str(e)), 403
+    except RequestConflict as e:
+        return jsonify(message=str(e)), 409
     except ValueError as e:
         return jsonify(message=str(e)), 400
     except Exception as e:
@@ -1,32 +1,38 @@
 from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
-from App.models import Student,Request,LoggedHours,Staff
+from App.models import Student,Request,RequestConflict,LoggedHours,Staff
 from.index import index_views
 from App.controllers.student_controller import get_all_students_json,fetch_accolades,create_hours_request
-from App.controllers.staff_controller import process_request_approval,process_request_denial
+from App.controllers.staff_controller import process_request_approval,process_request_denial,fetch_pending_page,AGE_FILTERS
 from App.database import db
+from.conditional import conditional
+from.idempotency import idempotent
 
 staff_views = Blueprint('staff_views', __name__, template_folder='../templates')
 
 @staff_views.route('/api/pending_requests', methods=['GET'])
 @jwt_required()
+@conditional('requests', per_user=True, uncached_args=AGE_FILTERS)
 def get_pending_requests():
     """
-    GET /api/pending_requests - Staff views all pending requests
+    GET /api/pending_requests - Staff views pending requests, oldest first
+    Paged with ?cursor=&limit= and filtered by student_id, min_hours,
+    max_hours, min_age_hours and max_age_hours
     """
     user = jwt_current_user
     if user.role != 'staff':
         return jsonify(message='Access forbidden: Not a staff member'), 403
 
-    pending_requests = Request.query.filter_by(status='pending').all()
+    try:
+        page = fetch_pending_page(request.args)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
 
-    return jsonify({
-        'count': len(pending_requests),
-        'requests': [req.get_json() for req in pending_requests]
-    }), 200
+    return jsonify(page), 200
 
 @staff_views.route('/api/approve_request', methods=['PUT'])
 @jwt_required()
+@idempotent
 def approve_request_action():
     """
     PUT /api/approve_request - Staff approves a request
@@ -40,7 +46,7 @@ def approve_request_action():
     if not data or 'request_id' not in data:
         return jsonify(message='Missing required field: request_id'), 400
 
-    req = Request.query.get(data['request_id'])
+    req = Request.find(data['request_id'])
     if not req:
         return jsonify(message='Request not found'), 404
 
@@ -54,6 +60,8 @@ def approve_request_action():
             'message': 'Request approved successfully',
             'request': req.get_json()
         }), 200
+    except RequestConflict as e:
+        return jsonify(message=str(e)), 409
     except ValueError as e:
         return jsonify(message=str(e)), 400
     except Exception as e:
@@ -62,6 +70,7 @@ def approve_request_action():
 
 @staff_views.route('/api/deny_request', methods=['PUT'])
 @jwt_required()
+@idempotent
 def deny_request_action_new():
     """
     PUT /api/deny_request - Staff denies a request
@@ -74,7 +83,7 @@ def deny_request_action_new():
     if not data or 'request_id' not in data:
         return jsonify(message='Missing required field: request_id'), 400
 
-    req = Request.query.get(data['request_id'])
+    req = Request.find(data['request_id'])
     if not req:
         return jsonify(message='Request not found'), 404
 
@@ -90,6 +99,8 @@ def deny_request_action_new():
             'message': 'Request denied successfully',
             'request': req.get_json()
         }), 200
+    except RequestConflict as e:
+        return jsonify(message=str(e)), 409
     except ValueError as e:
         return jsonify(message=str(e)), 400
     except Exception as e:
@@ -106,7 +117,7 @@ def delete_request_action():
     if not data or 'request_id' not in data:
         return jsonify(message='Invalid request data'), 400
     # Logic to delete the request 
-    req = Request.query.get(data['request_id'])
+    req = Request.find(data['request_id'])
     if not req:
         return jsonify(message='Request not found'), 404
     db.session.delete(req)
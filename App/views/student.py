@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
-from App.models import Student, StudentRecord, ActivityEntry, Leaderboard
+from App.models import Student, StudentRecord, ActivityEntry, Leaderboard, LeaderboardSnapshot, LeaderboardEntry, RankingEngine
 from.index import index_views
+from.conditional import conditional
+from.idempotency import idempotent
 from App.controllers.student_controller import get_all_students_json,fetch_accolades,create_hours_request
 
 student_views = Blueprint('student_views', __name__, template_folder='../templates')
@@ -51,6 +53,7 @@ def get_activity_history():
 
 @student_views.route('/api/leaderboard', methods=['GET'])
 @jwt_required()
+@conditional('leaderboard', per_user=True)
 def get_leaderboard():
     """
     GET /api/leaderboard - View the student leaderboard
@@ -68,20 +71,156 @@ def get_leaderboard():
     elif limit > 100:
         limit = 100
 
-    top_students = Leaderboard.get_top_students(limit=limit)
-    all_rankings = Leaderboard.recalculate_rankings()
-
+    # The top list, the total and the caller's rank all come from the RankIndex
+    top_students = Leaderboard.top(limit)
     current_user_rank = Leaderboard.get_student_rank(user.student_id)
 
     return jsonify({
-        'total_students': len(all_rankings),
+        'total_students': Leaderboard.get_total_students(),
         'showing': len(top_students),
         'leaderboard': top_students,
         'current_user_rank': current_user_rank
     }), 200
 
+@student_views.route('/api/leaderboard/page', methods=['GET'])
+@jwt_required()
+@conditional('leaderboard', per_user=True)
+def get_leaderboard_page():
+    """
+    GET /api/leaderboard/page?cursor=&limit= - Page through the full leaderboard
+    Pass the returned next_cursor to fetch the following page
+    Requires student role for access
+    """
+    user = jwt_current_user
+    if user.role != 'student':
+        return jsonify(message='Access forbidden: Not a student'), 403
+
+    limit = request.args.get('limit', default=20, type=int)
+
+    if limit <= 0:
+        limit = 20
+    elif limit > 100:
+        limit = 100
+
+    try:
+        page = Leaderboard.page(cursor=request.args.get('cursor'), limit=limit)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+
+    return jsonify({
+        'total_students': Leaderboard.get_total_students(),
+        'showing': len(page['leaderboard']),
+        'leaderboard': page['leaderboard'],
+        'next_cursor': page['next_cursor']
+    }), 200
+
+@student_views.route('/api/leaderboard/around_me', methods=['GET'])
+@jwt_required()
+@conditional('leaderboard', per_user=True)
+def get_leaderboard_around_me():
+    """
+    GET /api/leaderboard/around_me?k= - View the students ranked just above and below you
+    Requires student role for access
+    """
+    user = jwt_current_user
+    if user.role != 'student':
+        return jsonify(message='Access forbidden: Not a student'), 403
+
+    k = request.args.get('k', default=5, type=int)
+
+    if k < 0:
+        k = 5
+    elif k > 50:
+        k = 50
+
+    neighbours = Leaderboard.around(user.student_id, k)
+
+    return jsonify({
+        'total_students': Leaderboard.get_total_students(),
+        'current_user_rank': Leaderboard.get_student_rank(user.student_id),
+        'leaderboard': neighbours
+    }), 200
+
+@student_views.route('/api/leaderboard/<segment>/<value>', methods=['GET'])
+@jwt_required()
+@conditional('leaderboard', per_user=True)
+def get_segment_leaderboard(segment, value):
+    """
+    GET /api/leaderboard/<cohort|department>/<value>?cursor=&limit= - View the leaderboard for one segment
+    Students are ranked only against others in the same cohort or department
+    Requires student or staff role for access
+    """
+    user = jwt_current_user
+    if user.role not in ('student', 'staff'):
+        return jsonify(message='Access forbidden: Not a student or staff'), 403
+
+    if segment not in LeaderboardEntry.SEGMENTS:
+        return jsonify(message=f"Unknown segment: {segment}. Use one of {', '.join(LeaderboardEntry.SEGMENTS)}"), 400
+
+    limit = request.args.get('limit', default=20, type=int)
+
+    if limit <= 0:
+        limit = 20
+    elif limit > 100:
+        limit = 100
+
+    try:
+        page = Leaderboard.segment_page(segment, value, cursor=request.args.get('cursor'), limit=limit)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+
+    current_user_rank = None
+    if user.role == 'student':
+        current_user_rank = Leaderboard.get_segment_rank(user.student_id, segment, value)
+
+    return jsonify({
+        'segment': segment,
+        'value': value,
+        'total_students': page['total_students'],
+        'showing': len(page['leaderboard']),
+        'leaderboard': page['leaderboard'],
+        'next_cursor': page['next_cursor'],
+        'current_user_rank': current_user_rank
+    }), 200
+
+@student_views.route('/api/leaderboard/<window>', methods=['GET'])
+@jwt_required()
+@conditional('leaderboard', per_user=True, daily=True)
+def get_windowed_leaderboard(window):
+    """
+    GET /api/leaderboard/<week|month|term> - View the leaderboard for a time window
+    Ranks students by hours logged since the window start
+    Requires student role for access
+    """
+    user = jwt_current_user
+    if user.role != 'student':
+        return jsonify(message='Access forbidden: Not a student'), 403
+
+    if window not in RankingEngine.WINDOWS:
+        return jsonify(message=f"Unknown window: {window}. Use one of {', '.join(RankingEngine.WINDOWS)}"), 400
+
+    limit = request.args.get('limit', default=10, type=int)
+
+    if limit <= 0:
+        limit = 10
+    elif limit > 100:
+        limit = 100
+
+    snapshot = LeaderboardSnapshot(Leaderboard.rankings(window))
+    top_students = snapshot.top(limit)
+
+    return jsonify({
+        'window': window,
+        'since': RankingEngine.window_start(window).isoformat(),
+        'total_students': snapshot.total,
+        'showing': len(top_students),
+        'leaderboard': top_students,
+        'current_user_rank': snapshot.rank_of(user.student_id)
+    }), 200
+
 @student_views.route('/api/make_request', methods=['POST'])
 @jwt_required()
+@idempotent
 def make_request_action():
     user = jwt_current_user
     if user.role != 'student':
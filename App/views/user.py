@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, jsonify, request, send_from_direct
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
 from App.models import Student, Staff, User
 from.index import index_views
+from.conditional import conditional
 from App.controllers.student_controller import get_all_students_json,register_student
 from App.controllers.staff_controller import get_all_staff_json,register_staff
 from App.controllers import (
@@ -48,7 +49,7 @@ def create_student_endpoint():
         if u.email == data['email'] or u.username == data['name']:
             return jsonify({'message': f"User with email {data['email']} already exists or username {data['name']}."}), 400
     
-    student = register_student(data['name'], data['email'], data['password'])
+    student = register_student(data['name'], data['email'], data['password'], data.get('cohort'), data.get('department'))
     return jsonify({'message': f"Student {student.username} created with id {student.student_id}"})
 
 @user_views.route('/api/create_Staff', methods=['POST'])
@@ -68,22 +69,26 @@ def static_user_page():
   return send_from_directory('static', 'static-user.html')
 
 @user_views.route('/api/students', methods=['GET'])
+@conditional('students')
 def get_students_action():
     students = get_all_students_json()
     return jsonify(students)
 
 @user_views.route('/api/staff', methods=['GET'])
+@conditional('staff')
 def get_staff_action():
     staff_members = get_all_staff_json()
     return jsonify(staff_members)
 
 
 @user_views.route('/api/leaderboard', methods=['GET'])
+@conditional('leaderboard')
 def leaderboard_action():
     leaderboard = view_leaderboard()
     return jsonify(leaderboard)
 
 @user_views.route('/api/requests', methods=['GET'])
+@conditional('requests')
 def requests_action():
     requests = get_all_requests_json()
     return jsonify(requests)
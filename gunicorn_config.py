@@ -16,4 +16,12 @@ loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+# Each worker process also drains the observer outbox on a background thread,
+# and archives old closed requests when REQUEST_ARCHIVE_AFTER_DAYS is set
+def post_worker_init(worker):
+    from App.outbox import start_worker
+    from App.archive import start_archiver
+    start_worker(worker.wsgi)
+    start_archiver(worker.wsgi)
@@ -0,0 +1,167 @@
+"""add tables and columns since baseline
+
+Revision ID: 29a73f437efa
+Revises: 81eb8c5685aa
+Create Date: 2026-10-18 13:04:28.094310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29a73f437efa'
+down_revision = '81eb8c5685aa'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    """(table, columns and constraints, indexes as (name, columns)) for the tables added since the baseline"""
+    return [
+        ('data_version', [
+            sa.Column('name', sa.String(50), primary_key=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('epoch', sa.String(32), nullable=False),
+        ], []),
+        ('leaderboard_entry', [
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('student.student_id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('total_hours', sa.Float(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('cohort', sa.String(50), nullable=True),
+            sa.Column('department', sa.String(100), nullable=True),
+        ], [
+            ('ix_leaderboard_entry_rank', [sa.text('total_hours DESC'), 'student_id']),
+            ('ix_leaderboard_entry_cohort_rank', ['cohort', sa.text('total_hours DESC'), 'student_id']),
+            ('ix_leaderboard_entry_department_rank', ['department', sa.text('total_hours DESC'), 'student_id']),
+        ]),
+        ('activity_bucket', [
+            sa.Column('student_record_id', sa.Integer(), sa.ForeignKey('student_record.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('hours', sa.Float(), nullable=False),
+            sa.Column('entry_count', sa.Integer(), nullable=False),
+        ], [
+            ('ix_activity_bucket_day', ['day', 'student_record_id']),
+        ]),
+        ('outbox_event', [
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('event', sa.String(50), nullable=False),
+            sa.Column('student_record_id', sa.Integer(), sa.ForeignKey('student_record.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('available_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('processed_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.String(500), nullable=True),
+        ], [
+            ('ix_outbox_event_due', ['status', 'available_at', 'id']),
+        ]),
+        ('request_count', [
+            sa.Column('student_id', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('status', sa.String(20), primary_key=True),
+            sa.Column('count', sa.Integer(), nullable=False),
+        ], []),
+        ('idempotency_key', [
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user', sa.String(64), nullable=False),
+            sa.Column('key', sa.String(255), nullable=False),
+            sa.Column('fingerprint', sa.String(64), nullable=False),
+            sa.Column('status_code', sa.Integer(), nullable=True),
+            sa.Column('content_type', sa.String(100), nullable=True),
+            sa.Column('body', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('user', 'key', name='uq_idempotency_key_user_key'),
+        ], [
+            ('ix_idempotency_key_expires_at', ['expires_at']),
+        ]),
+        ('requests_archive', [
+            sa.Column('requestID', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('studentID', sa.Integer(), sa.ForeignKey('student.student_id', ondelete='CASCADE'), nullable=False),
+            sa.Column('staffID', sa.Integer(), sa.ForeignKey('staff.staff_id'), nullable=True),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('hours', sa.Float(), nullable=False),
+            sa.Column('description', sa.String(500), nullable=True),
+            sa.Column('claimed_by', sa.Integer(), sa.ForeignKey('staff.staff_id'), nullable=True),
+            sa.Column('claim_expires_at', sa.DateTime(), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+        ], [
+            ('ix_requests_archive_studentID', ['studentID']),
+        ]),
+    ]
+
+
+def _student_columns():
+    return [
+        sa.Column('cohort', sa.String(50), nullable=True),
+        sa.Column('department', sa.String(100), nullable=True),
+    ]
+
+
+def _request_columns():
+    return [
+        sa.Column('claimed_by', sa.Integer(), sa.ForeignKey('staff.staff_id', name='fk_requests_claimed_by_staff'), nullable=True),
+        sa.Column('claim_expires_at', sa.DateTime(), nullable=True),
+        # Existing rows start at version 1, as if just inserted
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    ]
+
+
+def _columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _request_batch():
+    # SQLite rebuilds the table so request ids become AUTOINCREMENT: ids
+    # moved to requests_archive must never be handed out again
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    return op.batch_alter_table(
+        'requests',
+        recreate='always' if sqlite else 'auto',
+        table_kwargs={'sqlite_autoincrement': True}
+    )
+
+
+def upgrade():
+    # Databases built with db.create_all() already have some or all of these
+    inspector = sa.inspect(op.get_bind())
+    for name, columns, indexes in _tables():
+        if inspector.has_table(name):
+            continue
+        op.create_table(name, *columns)
+        for index, index_columns in indexes:
+            op.create_index(index, name, index_columns)
+
+    existing = _columns(inspector, 'student')
+    for column in _student_columns():
+        if column.name not in existing:
+            op.add_column('student', column)
+
+    existing = _columns(inspector, 'requests')
+    missing = [column for column in _request_columns() if column.name not in existing]
+    if missing:
+        with _request_batch() as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = _columns(inspector, 'requests')
+    with op.batch_alter_table('requests') as batch_op:
+        for column in reversed(_request_columns()):
+            if column.name in existing:
+                batch_op.drop_column(column.name)
+
+    existing = _columns(inspector, 'student')
+    with op.batch_alter_table('student') as batch_op:
+        for column in reversed(_student_columns()):
+            if column.name in existing:
+                batch_op.drop_column(column.name)
+
+    for name, _, _ in reversed(_tables()):
+        if inspector.has_table(name):
+            op.drop_table(name)
@@ -0,0 +1,36 @@
+"""add leaderboard updated_at index
+
+Revision ID: 4e9bdc3657dc
+Revises: 8e9ac8420c9d
+Create Date: 2026-10-18 13:18:52.986324
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e9bdc3657dc'
+down_revision = '8e9ac8420c9d'
+branch_labels = None
+depends_on = None
+
+
+def _existing():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('leaderboard_entry'):
+        return None
+    return {index['name'] for index in inspector.get_indexes('leaderboard_entry')}
+
+
+def upgrade():
+    # Workers' RankIndexes catch up by reading the rows updated since they last synced
+    existing = _existing()
+    if existing is not None and 'ix_leaderboard_entry_updated_at' not in existing:
+        op.create_index('ix_leaderboard_entry_updated_at', 'leaderboard_entry', ['updated_at'])
+
+
+def downgrade():
+    existing = _existing()
+    if existing is not None and 'ix_leaderboard_entry_updated_at' in existing:
+        op.drop_index('ix_leaderboard_entry_updated_at', table_name='leaderboard_entry')
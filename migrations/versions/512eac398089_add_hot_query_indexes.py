@@ -0,0 +1,48 @@
+"""add hot query indexes
+
+Revision ID: 512eac398089
+Revises: 29a73f437efa
+Create Date: 2026-10-18 12:49:27.425243
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '512eac398089'
+down_revision = '29a73f437efa'
+branch_labels = None
+depends_on = None
+
+
+# (table, index, columns) for the predicates the app filters on
+INDEXES = [
+    ('requests', 'ix_requests_status_timestamp', ['status', 'timestamp', 'requestID']),
+    ('requests', 'ix_requests_student_status', ['studentID', 'status']),
+    ('logged_hours', 'ix_logged_hours_student_status', ['student_id', 'status']),
+    ('activity_entry', 'ix_activity_entry_record_timestamp', ['student_record_id', 'timestamp']),
+    ('users', 'ix_users_email', ['email']),
+]
+
+
+def _existing(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # Databases built with db.create_all() already have some or all of these
+    for table, name, columns in INDEXES:
+        existing = _existing(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        existing = _existing(table)
+        if existing is not None and name in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,80 @@
+"""baseline schema
+
+Revision ID: 81eb8c5685aa
+Revises:
+Create Date: 2026-10-18 13:04:24.226289
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '81eb8c5685aa'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    """The original tables, in dependency order"""
+    return [
+        ('users', [
+            sa.Column('user_id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(20), nullable=False, unique=True),
+            sa.Column('password', sa.String(256), nullable=False),
+            sa.Column('email', sa.String(256), nullable=False),
+            sa.Column('role', sa.String(256), nullable=False),
+        ]),
+        ('staff', [
+            sa.Column('staff_id', sa.Integer(), sa.ForeignKey('users.user_id'), primary_key=True),
+            sa.Column('department', sa.String(100), nullable=True),
+        ]),
+        ('student', [
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.user_id'), primary_key=True),
+        ]),
+        ('student_record', [
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('student.student_id'), nullable=False, unique=True),
+            sa.Column('total_hours', sa.Float(), nullable=False),
+            sa.Column('accolades', sa.JSON(), nullable=False),
+        ]),
+        ('requests', [
+            sa.Column('requestID', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('studentID', sa.Integer(), sa.ForeignKey('student.student_id'), nullable=False),
+            sa.Column('staffID', sa.Integer(), sa.ForeignKey('staff.staff_id'), nullable=True),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('hours', sa.Float(), nullable=False),
+            sa.Column('description', sa.String(500), nullable=True),
+        ]),
+        ('logged_hours', [
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('student.student_id'), nullable=False),
+            sa.Column('staff_id', sa.Integer(), sa.ForeignKey('staff.staff_id'), nullable=True),
+            sa.Column('hours', sa.Float(), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+        ]),
+        ('activity_entry', [
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('student_record_id', sa.Integer(), sa.ForeignKey('student_record.id'), nullable=False),
+            sa.Column('hours', sa.Float(), nullable=False),
+            sa.Column('description', sa.String(500), nullable=False),
+            sa.Column('logged_by', sa.String(100), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+        ]),
+    ]
+
+
+def upgrade():
+    # Databases built with db.create_all() or `flask init` already have these
+    inspector = sa.inspect(op.get_bind())
+    for name, columns in _tables():
+        if not inspector.has_table(name):
+            op.create_table(name, *columns)
+
+
+def downgrade():
+    for name, _ in reversed(_tables()):
+        op.drop_table(name)
@@ -0,0 +1,44 @@
+"""add request decided_at
+
+Revision ID: 8e9ac8420c9d
+Revises: 512eac398089
+Create Date: 2026-10-18 13:03:06.510474
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e9ac8420c9d'
+down_revision = '512eac398089'
+branch_labels = None
+depends_on = None
+
+
+# Tables that carry a request's decision time
+TABLES = ['requests', 'requests_archive']
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    # Requests decided before this column existed keep NULL; the archiver
+    # ages them on their submission timestamp instead
+    for table in TABLES:
+        columns = _columns(table)
+        if columns is not None and 'decided_at' not in columns:
+            op.add_column(table, sa.Column('decided_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in TABLES:
+        columns = _columns(table)
+        if columns is not None and 'decided_at' in columns:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('decided_at')
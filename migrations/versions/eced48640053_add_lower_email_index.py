@@ -0,0 +1,36 @@
+"""add lower email index
+
+Revision ID: eced48640053
+Revises: 4e9bdc3657dc
+Create Date: 2026-10-18 13:21:31.997885
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'eced48640053'
+down_revision = '4e9bdc3657dc'
+branch_labels = None
+depends_on = None
+
+
+def _existing():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('users'):
+        return None
+    return {index['name'] for index in inspector.get_indexes('users')}
+
+
+def upgrade():
+    # Imports match emails case-insensitively, on lower(email)
+    existing = _existing()
+    if existing is not None and 'ix_users_email_lower' not in existing:
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+
+
+def downgrade():
+    existing = _existing()
+    if existing is not None and 'ix_users_email_lower' in existing:
+        op.drop_index('ix_users_email_lower', table_name='users')
@@ -2,10 +2,13 @@ import click, pytest, sys
 from flask.cli import with_appcontext, AppGroup
 
 from App.database import db, get_migrate
+from App.cache import get_cache
+from App import outbox, importer, archive, explain
 from App.models import User
 from App.models import Student
 from App.models import Staff
-from App.models import Request
+from App.models import Request, RequestCount
+from App.models import LeaderboardEntry, ActivityBucket, MilestoneTable
 from App.main import create_app
 from App.controllers.student_controller import *
 from App.controllers.staff_controller import *
@@ -69,12 +72,121 @@ def listDeniedRequests():
     listAllDeniedRequests()
 
 
+#Comamand to show request counts per status, for everyone or one student
+@app.cli.command ("requestCounts", help="Shows how many requests are in each status")
+@click.option("--student-id", type=int, help="Only this student's requests")
+def requestCounts(student_id):
+    printRequestCounts(student_id)
+
+
 #Comamand to list all logged hours in the database
 @app.cli.command ("listloggedHours", help="Lists all logged hours in the database")
 def listloggedHours():
     listAllloggedHours()
 
 
+#Command to rebuild the persisted leaderboard tables from student records and activity history
+@app.cli.command ("rebuildLeaderboard", help="Rebuilds the leaderboard tables from student records")
+def rebuildLeaderboard():
+    count = LeaderboardEntry.rebuild()
+    print(f"Leaderboard rebuilt for {count} students")
+    buckets = ActivityBucket.rebuild()
+    print(f"Rebuilt {buckets} daily activity buckets")
+
+
+#Command to recount requests per status, for databases created before the counters existed
+@app.cli.command ("rebuildRequestCounts", help="Recounts requests per status from the requests table")
+def rebuildRequestCounts():
+    groups = RequestCount.rebuild()
+    print(f"Request counts rebuilt from {groups} student/status groups")
+
+
+#Command to show hit/miss counters for the cache shared by all workers
+@app.cli.command ("cacheStats", help="Shows shared cache hit/miss counters")
+def cacheStats():
+    stats = get_cache().stats()
+    print(f"\nShared cache: {stats['hits']} hits, {stats['misses']} misses")
+    for name, counts in stats['names'].items():
+        print(f"{name:<40} hits={counts['hits']:<8} misses={counts['misses']}")
+    print("\n")
+
+
+#Command to backfill accolades for every student after the MILESTONES setting changes
+@app.cli.command ("reevaluateMilestones", help="Awards milestones every student has reached but not been given")
+@click.option("--chunk-size", default=500, help="Student records processed per transaction")
+def reevaluateMilestones(chunk_size):
+    counts = MilestoneTable.current().reevaluate_all(chunk_size)
+    print(f"Scanned {counts['scanned']} records, awarded {counts['awarded']} milestones to {counts['updated']} students")
+
+
+#Command to deliver queued observer events (milestones etc.); --watch keeps polling
+@app.cli.command ("drainOutbox", help="Delivers pending observer events from the outbox")
+@click.option("--watch", is_flag=True, help="Keep polling for new events")
+@click.option("--batch-size", default=outbox.BATCH_SIZE, help="Events claimed per batch")
+def drainOutbox(watch, batch_size):
+    if watch:
+        import threading
+        print("Draining outbox, Ctrl+C to stop")
+        outbox.run_worker(app, threading.Event(), batch_size=batch_size)
+        return
+    delivered, failed = outbox.drain(batch_size)
+    print(f"Delivered {delivered} events, {failed} failed")
+
+
+#Command to move old approved/denied/canceled requests to the archive table
+@app.cli.command ("archiveRequests", help="Moves closed requests older than some days to the archive table")
+@click.option("--after-days", type=float, help="Age in days, defaults to REQUEST_ARCHIVE_AFTER_DAYS")
+@click.option("--batch-size", default=archive.BATCH_SIZE, help="Requests moved per transaction")
+def archiveRequests(after_days, batch_size):
+    try:
+        moved = archive.archive_closed(after_days, batch_size)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Archived {moved} requests")
+
+
+#Command to check the hot queries are planned on their indexes (run flask db upgrade first)
+@app.cli.command ("explainQueries", help="Runs EXPLAIN on the hot queries and reports index use")
+@click.option("--verbose", is_flag=True, help="Print each query plan")
+def explainQueries(verbose):
+    try:
+        results = explain.report()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    print("\n")
+    missing = 0
+    for result in results:
+        used = "uses" if result['uses_index'] else "DOES NOT USE"
+        print(f"{result['query']:<32} {used} {result['index']}")
+        if verbose or not result['uses_index']:
+            for line in result['plan']:
+                print(f"    {line}")
+        missing += not result['uses_index']
+    if missing:
+        print(f"\n{missing} queries are not using their index; run flask db upgrade")
+    print("\n")
+
+
+#Command to create pending requests from a CSV or JSON Lines file (student_id or email, hours, description)
+@app.cli.command ("importRequests", help="Creates pending requests from a CSV or JSONL file")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(importer.FORMATS), help="File format, detected from the extension by default")
+@click.option("--chunk-size", default=importer.CHUNK_SIZE, help="Rows inserted per transaction")
+def importRequests(path, fmt, chunk_size):
+    fmt = fmt or importer.detect_format(path)
+    if fmt is None:
+        print("Error: cannot tell the format from the file name, pass --format csv|jsonl")
+        return
+    with open(path, 'rb') as stream:
+        result = importer.import_requests(
+            stream, fmt, chunk_size, max_errors=0,
+            on_error=lambda line, message: print(f"Line {line}: {message}")
+        )
+    print(f"Imported {result['imported']} requests, {result['failed']} rows failed")
+
+
 
 '''STUDENT COMMANDS'''
 
@@ -107,7 +219,9 @@ def create_student():
         name = input("Enter student name: ")
         email = input("Enter student email: ")
         password = input("Enter student password: ")    
-        student = register_student(name, email, password)
+        cohort = input("Enter student cohort (optional): ") or None
+        department = input("Enter student department (optional): ") or None
+        student = register_student(name, email, password, cohort, department)
 
         print(f"Created student: {student}")
     except Exception as e:
@@ -194,8 +308,8 @@ def viewLeaderboard():
         if not leaderboard:
             print("No students found or hour data found.")
             return
-        for rank, data in enumerate(leaderboard, 1):
-            print(f"{rank:<6}. {data['name']:<10} ------ \t{data['hours']} hours")
+        for data in leaderboard:
+            print(f"{data['rank']:<6}. {data['name']:<10} ------ \t{data['hours']} hours")
 
     except Exception as e:
         print(f"An error occurred while generating the leaderboard: {e}")
@@ -319,8 +433,8 @@ def viewLeaderboard():
         if not leaderboard:
             print("No students found or hour data found.")
             return
-        for rank, data in enumerate(leaderboard, 1):
-            print(f"{rank:<6}. {data['name']:<10} ------ \t{data['hours']} hours")
+        for data in leaderboard:
+            print(f"{data['rank']:<6}. {data['name']:<10} ------ \t{data['hours']} hours")
 
     except Exception as e:
         print(f"An error occurred while generating the leaderboard: {e}")